@@ -2,7 +2,7 @@ from Poker import *
 from string import Template
 
 def whatsMyHand(cardArray):
-    hand = PokerHand([Card(c) for c in cardArray])
+    hand = PokerHand(parseCards(cardArray))
     print(hand)
 
 def whoIsTheWinner(*args, **kwargs):
@@ -11,10 +11,10 @@ def whoIsTheWinner(*args, **kwargs):
 
     players = dict()
     for i in range(len(args)):
-        players['Player' + str(i+1)] = PokerHand([Card(c) for c in args[i]])
+        players['Player' + str(i+1)] = LazyPokerHand(parseCards(args[i]))
     bestHand = max(players.values())
-    winners = [p for p in players.keys() if players[p].score() ==
-            bestHand.score()]
+    winners = [p for p in players.keys() if players[p].strength ==
+            bestHand.strength]
 
     if len(winners) == 1:
         print(f'The winner of this showdown is {winners[0]}:\n{bestHand}')
@@ -25,25 +25,65 @@ def whoIsTheWinner(*args, **kwargs):
             in winners]))
 
 def whichCardsShouldIChoose(cards):
-    hand = PokerHand([Card(c) for c in cards])
-    return [str(c.rank.value) + str(c.suit.value) for c in hand.cards]
+    hand = PokerHand(parseCards(cards))
+    return cardListString(hand.cards)
 
-def createSampleHands(N,C):
+# Structured results
+#
+# The same answers as the functions above, returned as dicts of plain strings
+# and numbers (Ex: to send as JSON) instead of printed.
+
+def handResult(hand):
+    """ Returns the category, strength, category rank, kicker and chosen
+    cards of a PokerHand """
+    return {
+            'category' : hand.category.name,
+            'strength' : hand.strength,
+            'categoryRank' : str(hand.categoryRank),
+            'kicker' : [str(k) for k in hand.kicker],
+            'cards' : cardListString(hand.cards)
+            }
+
+def handResults(cardArrays):
+    """ Returns the handResult of each list of 5 or more card strings. With
+    numpy installed, hands of 5, 6 and 7 cards are evaluated in batches. """
+    hands = [parseCards(cards) for cards in cardArrays]
+    for h in hands:
+        if len(set(c.code for c in h)) != len(h):
+            raise ValueError('The same card cannot be in a hand twice.')
+    strengths = [None] * len(hands)
+    try:
+        from PokerBatch import evaluateBatch
+    except ImportError:
+        evaluateBatch = None
+    if evaluateBatch is not None:
+        for size in (5, 6, 7):
+            indexes = [i for i, h in enumerate(hands) if len(h) == size]
+            if indexes:
+                batch = evaluateBatch([[c.code for c in hands[i]] for i in indexes])[0]
+                for i, strength in zip(indexes, batch.tolist()):
+                    strengths[i] = strength
+    return [handResult(PokerHand(h, s)) for h, s in zip(hands, strengths)]
+
+def showdownResult(results):
+    """ Returns the indexes of the winners among handResults """
+    best = max(r['strength'] for r in results)
+    return [i for i, r in enumerate(results) if r['strength'] == best]
+
+def createSampleHands(N,C, seed=None):
     """ returns a list of N lists of string representations of C cards drawn
-    randomly from a deck. C must be less than or equal to 52, as that is the number of cards in a deck. """
+    randomly from a deck. C must be less than or equal to 52, as that is the number of cards in a deck.
+    Pass a seed to get the same hands every time. """
     if (C > 52):
         raise ValueError("Number of cards must be less than or equal to 52")
-    deck = Deck()
-    handsInDeck = 0
+    deck = CodeDeck(seed=seed)
     hands = []
-    while handsInDeck < N:
-        try:
-            hands.append(cardListString(deck.takeCards(C)))
-            handsInDeck += 1
-        except ValueError:
-            deck = Deck()
+    for _ in range(N):
+        if len(deck) < C:
+            deck.reset()
+        hands.append([cardStringsByCode[c] for c in deck.deal(C)])
     return hands
 
 def cardListString(cards):
-    return [str(c.rank.value) + str(c.suit.value) for c in cards]
+    return [cardStringsByCode[c.code] for c in cards]
 
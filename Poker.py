@@ -1,7 +1,15 @@
 from enum import Enum, unique
 from functools import total_ordering
-from random import shuffle
+from random import shuffle, Random
 from collections import defaultdict
+from itertools import combinations, combinations_with_replacement
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+import zlib
 
 @unique
 class Suit(Enum):
@@ -46,56 +54,83 @@ class Rank(Enum):
         return self.getRankNumericalValue() < other.getRankNumericalValue()
 
     def getRankNumericalValue(self):
-        faceRankValues = {
-            'J' : 11,
-            'Q' : 12,
-            'K' : 13,
-            'A' : 14
-        }
-
-        try:
-            intValue = int(self.value)
-        except ValueError:
-            intValue = faceRankValues[self.value]
-
-        return intValue
+        return rankNumericalValues[self]
+
+# Ranks and Suits in declaration order. The position of a Rank in RANKS (TWO is
+# 0, ACE is 12) is the rank index used by the integer card encoding below.
+RANKS = list(Rank)
+SUITS = list(Suit)
+rankNumericalValues = { r : i + 2 for i, r in enumerate(RANKS) }
+rankIndexes = { r : i for i, r in enumerate(RANKS) }
+suitIndexes = { s : i for i, s in enumerate(SUITS) }
+
+# One prime per rank index. The product of the primes of 5 cards identifies the
+# multiset of their ranks regardless of order.
+RANK_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+def cardCode(rank, suit):
+    """ Returns the compact integer encoding of a card:
+
+        bits 16-28: one bit per rank (TWO is bit 16, ACE is bit 28)
+        bits 12-15: one bit per suit
+        bits  8-11: rank index
+        bits   0-7: prime of the rank """
+    r = rankIndexes[rank]
+    return (1 << (16 + r)) | (1 << (12 + suitIndexes[suit])) | (r << 8) | RANK_PRIMES[r]
 
 @total_ordering
 class Card (object):
-    """ Card Object with a Rank and Suit. Supports Comparison by Rank """
-    def __init__ (self, *args, **kwargs):
+    """ Card Object with a Rank and Suit. Supports Comparison by Rank.
+    There is a single, immutable Card for each rank and suit: constructing a
+    Card returns that shared instance. """
+    __slots__ = ('rank', 'suit', 'code')
+
+    def __new__ (cls, *args, **kwargs):
         if (len(args) == 1 and isinstance(args[0], str)):
             try:
-                self.initFromString(args[0])
-            except:
-                raise
+                return cardsByString[args[0]]
+            except KeyError:
+                return cardsByRankAndSuit[cls.parseString(args[0])]
         elif (len(args) == 2 and isinstance(args[0], Rank) and
                 isinstance(args[1], Suit)):
-                self.suit = args[1]
-                self.rank = args[0]
+                return cardsByRankAndSuit[args]
         else:
             raise TypeError
 
-    def initFromString(self, card):
-        """ Initalize a card object from a string representation of the rankfollowed by the suit (Ex: 4H = 4 of Hearts)
+    @classmethod
+    def create(cls, rank, suit):
+        """ Creates the shared Card of a rank and suit, only used to fill
+        cardsByRankAndSuit """
+        card = object.__new__(cls)
+        object.__setattr__(card, 'rank', rank)
+        object.__setattr__(card, 'suit', suit)
+        object.__setattr__(card, 'code', cardCode(rank, suit))
+        return card
+
+    @staticmethod
+    def parseString(card):
+        """ Parses a string representation of the rank followed by the suit (Ex: 4H = 4 of Hearts)
         The suit is given by the first letter of the suit name. E.g Hearts: H, Clubs: C.
         Ranks for non-numeric cards are given by the first letter of the rank. E.g. Queen: Q, Ace: A
-        Raises a ValueError if invalid Suit or Rank is supplied."""
+        Returns a (Rank, Suit) tuple. Raises a ValueError if invalid Suit or Rank is supplied."""
 
-        suitStr = card[-1]
-        try:
-            self.suit = Suit(suitStr)
-        except ValueError:
-            raise
+        suit = suitsByString.get(card[-1]) or Suit(card[-1])
 
         rankStr = card[:-1]
-        try:
-            self.rank = Rank(int(rankStr))
-        except ValueError:
+        rank = ranksByString.get(rankStr)
+        if rank is None:
             try:
-                self.rank = Rank(rankStr)
-            except:
-                raise
+                rank = Rank(int(rankStr))
+            except ValueError:
+                rank = Rank(rankStr)
+
+        return rank, suit
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Cards are immutable')
+
+    def __reduce__(self):
+        return (Card, (self.rank, self.suit))
 
     def __str__(self):
         return str(self.rank) + str(self.suit)
@@ -106,6 +141,29 @@ class Card (object):
     def __lt__(self, other):
         return self.rank < other.rank
 
+# The 52 shared Cards, and lookups from their string representations (Ex: 10H)
+cardsByRankAndSuit = { (r, s) : Card.create(r, s) for s in SUITS for r in RANKS }
+cardsByString = { str(r.value) + s.value : c for (r, s), c in
+        cardsByRankAndSuit.items() }
+cardStringsByCode = { c.code : string for string, c in cardsByString.items() }
+cardsByCode = { c.code : c for c in cardsByRankAndSuit.values() }
+ranksByString = { str(r.value) : r for r in RANKS }
+suitsByString = { s.value : s for s in SUITS }
+standardSortedDeck = tuple(cardsByRankAndSuit.values())
+
+def parseCards(cards):
+    """ Returns the Cards for a list of string representations (Ex: ['4H', 'AS']).
+    Raises a ValueError if a string is not a valid card. """
+    try:
+        return [cardsByString[c] for c in cards]
+    except KeyError:
+        return [Card(c) for c in cards]
+
+def cardCodes(cards):
+    """ Returns the card codes of a list of cards given as Card objects or as
+    strings (Ex: 'AH') """
+    return [c.code if isinstance(c, Card) else Card(c).code for c in (cards or [])]
+
 @total_ordering
 @unique
 class PokerHandCategory(Enum):
@@ -139,339 +197,437 @@ class PokerHandCategory(Enum):
 
         return images[self.name] + ' ' + self.name[0] + str.lower(self.name[1:].replace('_',' '))
 
+# Lookup-table evaluator
+#
+# Every 5-card hand belongs to one of 7462 equivalence classes. Classes are
+# numbered by strength from 1 (7-5-4-3-2 high card) to 7462 (royal flush), so
+# comparing two hands is comparing two integers. handClasses[strength] holds
+# the category of the class, the rank indexes that describe it (the category
+# rank followed by the kicker ranks) and the ranks of its 5 cards.
+#
+# Hands are looked up by the compact card codes: flushes by the OR of the rank
+# bits, hands of 5 distinct ranks likewise, and hands with repeated ranks by
+# the product of the rank primes.
+
+STRAIGHT_HIGH_INDEXES = list(range(3, 13))
+
+def straightRanks(high):
+    """ Returns the rank indexes of the straight with the given high rank index,
+    in descending order. A high index of 3 (FIVE) is the wheel: 5 4 3 2 A """
+    return tuple(high - i if high - i >= 0 else 12 for i in range(5))
+
+def rankBits(ranks):
+    bits = 0
+    for r in ranks:
+        bits |= 1 << r
+    return bits
+
+def primeProduct(ranks):
+    product = 1
+    for r in ranks:
+        product *= RANK_PRIMES[r]
+    return product
+
+def descendingCombinations(ranks, n):
+    """ All combinations of n of the given rank indexes, each in descending order,
+    sorted from weakest to strongest """
+    return sorted(tuple(sorted(c, reverse=True)) for c in combinations(ranks, n))
+
+def buildHandClasses():
+    """ Enumerates the 7462 hand classes from weakest to strongest. Returns a list
+    of (category, ranks, cardRanks) tuples where ranks are the category rank
+    followed by the kicker, and cardRanks the rank of each of the 5 cards. """
+    allRanks = range(13)
+    straights = set(rankBits(straightRanks(h)) for h in STRAIGHT_HIGH_INDEXES)
+    noStraights = [c for c in descendingCombinations(allRanks, 5)
+            if rankBits(c) not in straights]
+    classes = []
+
+    classes.extend((PokerHandCategory.HIGH_CARD, c, c) for c in noStraights)
+    for p in allRanks:
+        for k in descendingCombinations([r for r in allRanks if r != p], 3):
+            classes.append((PokerHandCategory.ONE_PAIR, (p,) + k, (p, p) + k))
+    for high in allRanks:
+        for low in range(high):
+            for k in allRanks:
+                if k != high and k != low:
+                    classes.append((PokerHandCategory.TWO_PAIR, (high, low, k),
+                        (high, high, low, low, k)))
+    for t in allRanks:
+        for k in descendingCombinations([r for r in allRanks if r != t], 2):
+            classes.append((PokerHandCategory.THREE_OF_A_KIND, (t,) + k,
+                (t, t, t) + k))
+    for h in STRAIGHT_HIGH_INDEXES:
+        classes.append((PokerHandCategory.STRAIGHT, straightRanks(h),
+            straightRanks(h)))
+    classes.extend((PokerHandCategory.FLUSH, c, c) for c in noStraights)
+    for t in allRanks:
+        for p in allRanks:
+            if p != t:
+                classes.append((PokerHandCategory.FULL_HOUSE, (t, p, p),
+                    (t, t, t, p, p)))
+    for q in allRanks:
+        for k in allRanks:
+            if k != q:
+                classes.append((PokerHandCategory.FOUR_OF_A_KIND, (q, k),
+                    (q, q, q, q, k)))
+    for h in STRAIGHT_HIGH_INDEXES:
+        category = (PokerHandCategory.ROYAL_FLUSH if h == 12 else
+                PokerHandCategory.STRAIGHT_FLUSH)
+        classes.append((category, straightRanks(h), straightRanks(h)))
+
+    return classes
+
+FLUSH_CATEGORIES = (PokerHandCategory.FLUSH, PokerHandCategory.STRAIGHT_FLUSH,
+        PokerHandCategory.ROYAL_FLUSH)
+
+# 6- and 7-card evaluation
+#
+# Each card maps to an evaluation key: the low 24 bits hold a per-rank key, the
+# bits above hold one 4-bit counter per suit. RANK_KEYS are chosen so that the
+# sum over any 7 ranks (at most 4 of each) is unique, so adding the keys of the
+# cards gives both the suit counts and an index into a table of the best hand
+# for that multiset of ranks. With FLUSH_BIAS added, a suit counter reaches 8
+# exactly when the suit holds 5 or more cards; flushes are then looked up by the
+# rank bits of the cards of that suit.
+
+RANK_KEYS = (0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345,
+        1479181)
+RANK_KEY_MASK = 0xFFFFFF
+FLUSH_BIAS = 0x3333 << 24
+FLUSH_CHECK = 0x8888 << 24
+flushSuitBits = { 0x8 << (24 + 4 * i) : 1 << (12 + i) for i in range(4) }
+evaluationKeys = { cardCode(r, s) : RANK_KEYS[rankIndexes[r]] | 1 << (24 + 4 * i)
+        for r in RANKS for i, s in enumerate(SUITS) }
+
+# Table file
+#
+# The evaluator tables are built once, written to a versioned binary file next
+# to this module and memory mapped on the first evaluation, so every process
+# using the evaluator shares the same read-only pages. The header holds a
+# fingerprint of the table parameters and a checksum of the tables; a file that
+# does not match is rebuilt. handClasses is rebuilt on load, it only takes a
+# few milliseconds.
+
+TABLE_FILE_MAGIC = b'PKRT'
+TABLE_FILE_VERSION = 1
+TABLE_TYPES = (
+        ('flush', 'H'),
+        ('unique', 'H'),
+        ('productKeys', 'I'),
+        ('productStrengths', 'H'),
+        ('six', 'H'),
+        ('seven', 'H')
+        )
+TABLE_FILE_HEADER = struct.Struct('<4sIII' + 'Q' * len(TABLE_TYPES))
+TABLE_FINGERPRINT = zlib.crc32(repr((RANK_PRIMES, RANK_KEYS, TABLE_TYPES,
+    sys.byteorder)).encode())
+defaultTablePath = os.environ.get('POKER_TABLES', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'PokerHandRanks.bin'))
+
+handClasses = None
+flushTable = None
+uniqueTable = None
+productKeys = None
+productStrengths = None
+sixTable = None
+sevenTable = None
+
+def rankMultisets(n):
+    """ All multisets of n rank indexes with at most 4 of any rank """
+    for ranks in combinations_with_replacement(range(13), n):
+        if all(ranks[i] != ranks[i + 4] for i in range(n - 4)):
+            yield ranks
+
+def buildRankTable(n, smaller):
+    """ Returns the table of best strengths for every multiset of n ranks,
+    indexed by the sum of their RANK_KEYS, and a dict of the same entries.
+    smaller holds the entries for multisets of n - 1 ranks. """
+    best = {}
+    for ranks in rankMultisets(n):
+        key = sum(RANK_KEYS[r] for r in ranks)
+        best[key] = max(smaller[key - RANK_KEYS[r]] for r in set(ranks))
+    table = array('H', bytes(2 * (max(best) + 1)))
+    for key, strength in best.items():
+        table[key] = strength
+    return table, best
+
+def buildTables():
+    """ Computes the evaluator tables. Returns a dict of arrays keyed by the
+    names in TABLE_TYPES """
+    flush = array('H', bytes(2 * 8192))
+    unique = array('H', bytes(2 * 8192))
+    products = {}
+    for strength, (category, _, cardRanks) in enumerate(buildHandClasses(), 1):
+        if category in FLUSH_CATEGORIES:
+            flush[rankBits(cardRanks)] = strength
+        elif len(set(cardRanks)) == 5:
+            unique[rankBits(cardRanks)] = strength
+        else:
+            products[primeProduct(cardRanks)] = strength
+
+    fiveBest = {}
+    for ranks in rankMultisets(5):
+        if len(set(ranks)) == 5:
+            fiveBest[sum(RANK_KEYS[r] for r in ranks)] = unique[rankBits(ranks)]
+        else:
+            fiveBest[sum(RANK_KEYS[r] for r in ranks)] = products[primeProduct(ranks)]
+    six, sixBest = buildRankTable(6, fiveBest)
+    seven, _ = buildRankTable(7, sixBest)
+
+    # Flushes of 6 and 7 cards play the best 5 cards of the suit.
+    for mask in sorted(range(8192), key=lambda m: bin(m).count('1')):
+        if bin(mask).count('1') > 5:
+            flush[mask] = max(flush[mask & ~(1 << b)] for b in range(13)
+                    if mask & (1 << b))
+
+    productList = sorted(products)
+    return {
+            'flush' : flush,
+            'unique' : unique,
+            'productKeys' : array('I', productList),
+            'productStrengths' : array('H', [products[p] for p in productList]),
+            'six' : six,
+            'seven' : seven
+            }
+
+def padding(size):
+    """ Zero bytes aligning a table of the given size to 8 bytes """
+    return b'\0' * (-size % 8)
+
+def writeTableFile(path=None):
+    """ Builds the evaluator tables and writes them to a table file. Only needs
+    to run once, a stale file is rebuilt automatically on load:
+    python -c "import Poker; Poker.writeTableFile()" """
+    path = path or defaultTablePath
+    tables = buildTables()
+    payload = bytearray()
+    for name, _ in TABLE_TYPES:
+        data = tables[name].tobytes()
+        payload += data + padding(len(data))
+    header = TABLE_FILE_HEADER.pack(TABLE_FILE_MAGIC, TABLE_FILE_VERSION,
+            TABLE_FINGERPRINT, zlib.crc32(payload),
+            *[len(tables[name]) * tables[name].itemsize for name, _ in TABLE_TYPES])
+
+    # Write next to the target and rename, so readers never see a partial file.
+    tempPath = f'{path}.{os.getpid()}.tmp'
+    with open(tempPath, 'wb') as f:
+        f.write(header + padding(len(header)) + payload)
+    os.replace(tempPath, path)
+    return tables
+
+def readTableFile(path=None):
+    """ Memory maps a table file. Returns a dict of read-only memoryviews keyed
+    by table name, or None if the file is missing, stale or corrupt. """
+    path = path or defaultTablePath
+    try:
+        with open(path, 'rb') as f:
+            tableMap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(tableMap) < TABLE_FILE_HEADER.size:
+        return None
+    magic, version, fingerprint, checksum, *sizes = TABLE_FILE_HEADER.unpack_from(tableMap)
+    start = TABLE_FILE_HEADER.size + len(padding(TABLE_FILE_HEADER.size))
+    if (magic != TABLE_FILE_MAGIC or version != TABLE_FILE_VERSION or
+            fingerprint != TABLE_FINGERPRINT or
+            len(tableMap) != start + sum(n + len(padding(n)) for n in sizes)):
+        return None
+    view = memoryview(tableMap)
+    if zlib.crc32(view[start:]) != checksum:
+        return None
+
+    tables = {}
+    for (name, typecode), size in zip(TABLE_TYPES, sizes):
+        tables[name] = view[start:start + size].cast(typecode)
+        start += size + len(padding(size))
+    return tables
+
+def loadTables(path=None):
+    """ Loads the evaluator tables from the table file, rebuilding the file if
+    it is missing or stale. Falls back to in-memory tables if the file cannot
+    be written. Called on the first evaluation. """
+    global handClasses, flushTable, uniqueTable, productKeys, productStrengths
+    global sixTable, sevenTable
+
+    tables = readTableFile(path)
+    if tables is None:
+        try:
+            writeTableFile(path)
+            tables = readTableFile(path)
+        except OSError:
+            pass
+    if tables is None:
+        tables = buildTables()
+
+    flushTable = tables['flush']
+    uniqueTable = tables['unique']
+    productKeys = tables['productKeys']
+    productStrengths = tables['productStrengths']
+    sixTable = tables['six']
+    sevenTable = tables['seven']
+    handClasses = [None] + buildHandClasses()
+
+def evaluateFive(c1, c2, c3, c4, c5):
+    """ Returns the strength (1-7462, higher is better) of 5 card codes """
+    if handClasses is None:
+        loadTables()
+    if c1 & c2 & c3 & c4 & c5 & 0xF000:
+        return flushTable[(c1 | c2 | c3 | c4 | c5) >> 16]
+    strength = uniqueTable[(c1 | c2 | c3 | c4 | c5) >> 16]
+    if strength:
+        return strength
+    return productStrengths[bisect_left(productKeys, (c1 & 0xFF) * (c2 & 0xFF) *
+        (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF))]
+
+def evaluateSix(c1, c2, c3, c4, c5, c6):
+    """ Returns the strength of the best 5 of 6 card codes """
+    if handClasses is None:
+        loadTables()
+    k = evaluationKeys
+    key = k[c1] + k[c2] + k[c3] + k[c4] + k[c5] + k[c6] + FLUSH_BIAS
+    flush = key & FLUSH_CHECK
+    if flush:
+        s = flushSuitBits[flush]
+        return flushTable[(c1 >> 16 if c1 & s else 0) | (c2 >> 16 if c2 & s else 0) |
+                (c3 >> 16 if c3 & s else 0) | (c4 >> 16 if c4 & s else 0) |
+                (c5 >> 16 if c5 & s else 0) | (c6 >> 16 if c6 & s else 0)]
+    return sixTable[key & RANK_KEY_MASK]
+
+def evaluateSeven(c1, c2, c3, c4, c5, c6, c7):
+    """ Returns the strength of the best 5 of 7 card codes """
+    if handClasses is None:
+        loadTables()
+    k = evaluationKeys
+    key = k[c1] + k[c2] + k[c3] + k[c4] + k[c5] + k[c6] + k[c7] + FLUSH_BIAS
+    flush = key & FLUSH_CHECK
+    if flush:
+        s = flushSuitBits[flush]
+        return flushTable[(c1 >> 16 if c1 & s else 0) | (c2 >> 16 if c2 & s else 0) |
+                (c3 >> 16 if c3 & s else 0) | (c4 >> 16 if c4 & s else 0) |
+                (c5 >> 16 if c5 & s else 0) | (c6 >> 16 if c6 & s else 0) |
+                (c7 >> 16 if c7 & s else 0)]
+    return sevenTable[key & RANK_KEY_MASK]
+
+def evaluateCodes(codes):
+    """ Returns the strength of the best 5-card hand in a list of 5 or more
+    card codes """
+    if len(codes) == 7:
+        return evaluateSeven(*codes)
+    if len(codes) == 5:
+        return evaluateFive(*codes)
+    if len(codes) == 6:
+        return evaluateSix(*codes)
+    return max(evaluateSeven(*c) for c in combinations(codes, 7))
+
+def chooseCards(cards, strength):
+    """ Returns the 5 of the given cards that make a hand of the given
+    strength """
+    if handClasses is None:
+        loadTables()
+    category, _, cardRanks = handClasses[strength]
+    if category in FLUSH_CATEGORIES:
+        # Play the suit that holds every rank of the flush, as with 10 or more
+        # cards two suits can have 5 cards.
+        bySuit = defaultdict(list)
+        for c in cards:
+            bySuit[c.suit].append(c)
+        needed = rankBits(cardRanks)
+        cards = next(s for s in bySuit.values() if
+                rankBits((c.code >> 8) & 0xF for c in s) & needed == needed)
+    chosen = []
+    for r in cardRanks:
+        for c in cards:
+            if (c.code >> 8) & 0xF == r and not any(c is d for d in chosen):
+                chosen.append(c)
+                break
+    return chosen
+
+def strengthCategory(strength):
+    if handClasses is None:
+        loadTables()
+    return handClasses[strength][0]
+
+def orderHandCards(cards, strength):
+    """ Sorts the 5 cards of a hand of the given strength in place, highest
+    first. A wheel plays its ace low, so it is listed last. """
+    if handClasses is None:
+        loadTables()
+    cards.sort(reverse=True)
+    category, ranks, _ = handClasses[strength]
+    if (ranks[0] == rankIndexes[Rank.FIVE] and cards[0].rank == Rank.ACE and
+            category in (PokerHandCategory.STRAIGHT, PokerHandCategory.STRAIGHT_FLUSH)):
+        cards.append(cards.pop(0))
+    return cards
+
 @total_ordering
 class PokerHand(object):
-    def __init__(self, cards):
+    def __init__(self, cards, strength=None):
+        """ Makes the best hand of 5 or more cards. Pass the strength of the
+        cards if it is already known (Ex: from PokerBatch) to skip evaluating
+        them again. """
         if (cards == None or len(cards) < 5):
             raise TypeError('Must have at least 5 cards to make a Poker Hand')
         if (len(cards) == 5):
             self.cards = cards
-            self.cards.sort(reverse=True)
-            self.category = self.determineCategory()
-            self.categoryRank = self.determineCategoryRank()
-            self.kicker = self.determineKicker()
+            self.strength = strength or evaluateFive(*[c.code for c in cards])
         else:
-            self.cards = self.bestHand(cards)
-            self.cards.sort(reverse = True)
-            self.category = self.determineCategory()
-            self.categoryRank = self.determineCategoryRank()
-            self.kicker = self.determineKicker()
+            self.strength = strength or evaluateCodes([c.code for c in cards])
+            self.cards = chooseCards(cards, self.strength)
+        self.category = self.determineCategory()
+        self.categoryRank = self.determineCategoryRank()
+        self.kicker = self.determineKicker()
+        orderHandCards(self.cards, self.strength)
 
     def score(self):
         """ score function to give an integer value to a hand, useful for
-        identifying ties/ equivalent hands """
-        return (self.category.value * 10**4 +
-                self.categoryRank.getRankNumericalValue() * 10**2 +
-                sum([r.getRankNumericalValue() for r in self.kicker])
-                )
+        identifying ties/ equivalent hands. Equal to the strength, so hands of
+        different kickers never share a score """
+        return self.strength
 
     def bestHand(self, cards):
         """ Given a list of 5 or more unique cards, returns an array of the 5 cards that
         will result in the highest ranking Poker Hand."""
-
-        cardsByRank = defaultdict(list)
-        cardsBySuit = defaultdict(list)
-
-        for c in cards:
-            cardsByRank[c.rank].append(c)
-            cardsBySuit[c.suit].append(c)
-
-        cardsInRank = { k : len(cardsByRank[k]) for k in cardsByRank.keys() }
-        cardsInSuit = { k : len(cardsBySuit[k]) for k in cardsBySuit.keys() }
-
-        mostCardsInASuit = max(cardsInSuit.values())
-        mostCardsInARank = max(cardsInRank.values())
-        numRanks = len(cardsByRank.keys())
-
-        #Check to see if prereqs for Royal Flush or Straight Flush are met.
-        # Requires 5 consecutive cards of one suit, thus requiring 5 different
-        # ranks
-
-        if (mostCardsInASuit >=5 and numRanks >=5):
-            potentialSuits = [n for n in cardsInSuit.keys() if cardsInSuit[n] >= 5]
-            potentialHands = [self.getHighestConsecutiveHand(cardsBySuit[s]) for
-                    s in potentialSuits if
-                    self.getHighestConsecutiveHand(cardsBySuit[s]) is not None]
-            if any(potentialHands):
-                return max(potentialHands)
-
-        def assembleHandWithNOfRank(n):
-            hand = []
-            potentialRanks = [r for r in cardsInRank.keys() if cardsInRank[r] >= n ]
-            hand.extend(cardsByRank[max(potentialRanks)][:n])
-            hand.extend(self.getBestNCards([c for c in cards if c not in
-                hand],5-n))
-            return hand;
-        # Check to see if prereqs for 4 of a kind are met.
-        # Requires 4 cards of the same rank
-
-        if mostCardsInARank >=4:
-            return assembleHandWithNOfRank(4);
-        #Check to see if prereqs for Full House are met.
-        # Requires at least one rank with 3+ cards and at least 2 ranks with 2+
-        # cards.
-        if (mostCardsInARank >= 3 and len ([ v for v in cardsInRank.values() if v
-            >=2]) >=2):
-            hand = []
-            potentialRanksFor3 = [ r for r in cardsInRank.keys() if cardsInRank[r] >= 3]
-            rankOf3 = max(potentialRanksFor3)
-            hand.extend(cardsByRank[rankOf3][:3])
-            potentialRanksFor2 = [r for r in cardsInRank.keys() if cardsInRank[r] >= 2 and r != rankOf3]
-            rankOf2 = max(potentialRanksFor2)
-            hand.extend(cardsByRank[rankOf2][:2])
-            return hand
-
-
-
-        # Check to see if prereqs for Flush are met.
-        # Requires 5 cards of one Suit.
-        if (mostCardsInASuit >= 5):
-            potentialSuits = [s for s in cardsInSuit.keys() if cardsInSuit[s]
-                    >= 5]
-            potentialHands = [self.getBestNCards(cardsBySuit[s], 5) for s in
-                    potentialSuits]
-            return max(potentialHands)
-
-        # Check to see if prereqs for Straight are met.
-        # Requires 5 cards of consecutive Rank, thus requiring 5 different
-        # ranks.
-
-        if (numRanks >= 5):
-            hand  = self.getHighestConsecutiveHand(cards)
-            if hand is not None:
-                return hand
-
-        # Check to see if prereqs for 3 of a Kind are met.
-        # Requires a rank with 3 cards
-
-        if (mostCardsInARank >=3):
-            return assembleHandWithNOfRank(3)
-
-        # Check to see if prereqs for 2 Pair are met
-        # Requires 2 ranks with 2 cards
-
-        if (mostCardsInARank >= 2 and len([n for n in cardsInRank.values() if
-            n >= 2]) >= 2):
-            potentialRanks = [r for r in cardsInRank.keys() if cardsInRank[r] >=
-                    2]
-            firstRank = max(potentialRanks)
-            secondRank = max([r for r in potentialRanks if r != firstRank])
-            hand = cardsByRank[firstRank][:2]
-            hand.extend(cardsByRank[secondRank][:2])
-            hand.extend(self.getBestNCards([c for c in cards if c not in
-                hand],1))
-            return hand
-
-        # Only a one pair or a high card can be returned, which one is
-        # determined by the max cards per rank.
-
-        return assembleHandWithNOfRank(mostCardsInARank)
-
-    def getBestNCards(self, cards, n):
-        if len(cards) < n:
-            raise ValueError(f'Must have at least {n} cards to choose {n} best cards.')
-        cards.sort(reverse=True)
-        return cards[:n]
-
-    def getHighestConsecutiveHand(self, cards):
-        """ Given a list of cards, returns the highest ranking set of 5 cards in
-        descending order, or None if no set of 5 consecutive cards exists."""
-        if (len(cards) < 5):
-            return None
-        cards.sort(reverse=True)
-        hand = [cards[0]]
-        cardsToCollect = 4
-
-        for i in range(1,len(cards)):
-            if cardsToCollect == 0:
-                return hand
-            if(cards[i].rank.getRankNumericalValue() ==
-                    hand[-1].rank.getRankNumericalValue() - 1):
-                hand.append(cards[i])
-                cardsToCollect -= 1
-            elif cards[i].rank == hand[-1].rank:
-                pass
-            else:
-                hand = [cards[i]]
-                cardsToCollect = 4
-
-        if len(hand) == 5:
-            return hand
-
-        return None
-
-
-
-
-
+        return chooseCards(cards, evaluateCodes([c.code for c in cards]))
 
     def determineCategory(self):
-        cardsByRank = defaultdict(list)
-        cardsBySuit = defaultdict(list)
-
-        for c in self.cards:
-            cardsByRank[c.rank].append(c)
-            cardsBySuit[c.suit].append(c)
-
-        numRanks = len(cardsByRank.keys())
-        numSuits = len(cardsBySuit.keys())
-
-        rankCounts = list(map(lambda x: len(cardsByRank[x]),
-            cardsByRank.keys()))
-        rankCounts.sort(reverse=True)
-        #TODO change diffRanks to isConsecutive
-        diffRanks = self.cards[0].rank.getRankNumericalValue() - self.cards[len(self.cards) - 1].rank.getRankNumericalValue()
-
-
-        # Check for Royal Flush and Straight
-        # Prereqs: Cards are Consecutive and there is only one Suit
-        # The Highest card is an Ace, it's a Royal Flush
-        # The Highest card is not an Ace, it's a Straight Flush
-        if (diffRanks == 4 and numSuits == 1):
-            if (self.cards[0].rank == Rank.ACE):
-                return PokerHandCategory.ROYAL_FLUSH
-            else:
-                return PokerHandCategory.STRAIGHT_FLUSH
-
-        # Check for 4 of a Kind or Full House,
-        # Prereqs: There are 2 Ranks.
-        # The count of a rank is in [4, 1] it's a Four of a kind
-        # The count of a rank is in [2, 3], it's a Full House
-        if (numRanks == 2):
-            if (rankCounts[0] == 4):
-                return PokerHandCategory.FOUR_OF_A_KIND
-            else:
-                return PokerHandCategory.FULL_HOUSE
-
-        # Check for a Straight or Flush
-        # Prereqs: There are 5 Ranks
-        # If there is one Suit, it's a Flush
-        # If the cards are consecutive, it's a Straight
-        if (numRanks == 5):
-            if (numSuits == 1):
-                return PokerHandCategory.FLUSH
-            elif (diffRanks == 4):
-                return PokerHandCategory.STRAIGHT
-
-        # Check for 3 of A Kind or Two Pair
-        # Prereqs: There are 3 Ranks
-        # Counts are [3, 1, 1] it's a 3Kind
-        # Counts are [2, 2, 1] it's a 2Pair
-        if (numRanks == 3):
-            if (rankCounts[0] == 3):
-                return PokerHandCategory.THREE_OF_A_KIND
-            else:
-                return PokerHandCategory.TWO_PAIR
-
-        # Check for One Pair or High Card
-        # Prereqs: There are more than 3 ranks, and it is not a Straight
-        # If there are 4 ranks, it's One Pair
-        # If there are 5 ranks, it's High Card
-        if (numRanks == 4):
-            return PokerHandCategory.ONE_PAIR
-
-        return PokerHandCategory.HIGH_CARD
+        return strengthCategory(self.strength)
 
     def determineCategoryRank(self):
-        highCardCategories = [
-                PokerHandCategory.ROYAL_FLUSH,
-                PokerHandCategory.STRAIGHT_FLUSH,
-                PokerHandCategory.FLUSH,
-                PokerHandCategory.STRAIGHT,
-                PokerHandCategory.HIGH_CARD
-                ]
-
-        rankMostRepeatedCategories = [
-                PokerHandCategory.FOUR_OF_A_KIND,
-                PokerHandCategory.FULL_HOUSE,
-                PokerHandCategory.THREE_OF_A_KIND,
-                PokerHandCategory.ONE_PAIR
-                ]
-
-        # For all of these categories, the category rank is determined by the highest card, which is the first card since self.cards is sorted
-        if (self.category in highCardCategories):
-            return self.cards[0].rank
-
-        cardsInRank = defaultdict(int)
-        for c in self.cards:
-            cardsInRank[c.rank] += 1
-        # For all of these categories, the category rank is determined by the rank with the most cards in the hand, which is unique.
-        if (self.category in rankMostRepeatedCategories):
-            return max(cardsInRank, key=cardsInRank.get)
-
-        # The only remaining Category is Two of a Kind, where the category rank is determined by the higher rank between the two pairs
-        return max(
-                list(
-                    filter(
-                        lambda x: cardsInRank.get(x) == 2,
-                        cardsInRank.keys()
-                        )
-                    )
-                )
+        """ The rank that decides between hands of the same category: the rank
+        of the repeated cards for pairs, trips, quads and full houses, the
+        higher pair for two pairs, and the high card otherwise. """
+        if handClasses is None:
+            loadTables()
+        return RANKS[handClasses[self.strength][1][0]]
 
     def determineKicker(self):
-        highCardCategories = [
-                PokerHandCategory.ROYAL_FLUSH,
-                PokerHandCategory.STRAIGHT_FLUSH,
-                PokerHandCategory.FLUSH,
-                PokerHandCategory.STRAIGHT,
-                PokerHandCategory.HIGH_CARD
-                ]
-
-        # For all hands in this category, the kicker is the sorted hand without
-        # the high card.
-
-        if (self.category in highCardCategories):
-            return list(map(lambda c: c.rank, self.cards[1:]))
-
-        rankMostRepeatedCategories = [
-                PokerHandCategory.FOUR_OF_A_KIND,
-                PokerHandCategory.THREE_OF_A_KIND,
-                PokerHandCategory.ONE_PAIR,
-                PokerHandCategory.FULL_HOUSE
-                ]
-        # For all hands in this category, the kicker is the sorted cards
-        # remaining after all cards of the category rank have been removed.
-
-        if (self.category in rankMostRepeatedCategories):
-            kickerRanks = [c.rank for c in self.cards if c.rank !=
-                    self.categoryRank]
-            kickerRanks.sort(reverse=True)
-            return kickerRanks
-
-        # Two pairs is the only  remaining hand category. The kicker is the
-        # lower ranking pair, followed by the remaining 1 unpaired card's rank.
-
-        cardsInRank = defaultdict(int)
-        for c in self.cards:
-            cardsInRank[c.rank] += 1
-
-        kickerRanks = [min([ k for k in cardsInRank.keys() if cardsInRank[k] == 2]),
-                [k for k in cardsInRank.keys() if cardsInRank[k] == 1][0]]
-        return kickerRanks
+        """ The ranks that break ties between hands of the same category and
+        category rank, in the order they are compared. """
+        if handClasses is None:
+            loadTables()
+        return [RANKS[r] for r in handClasses[self.strength][1][1:]]
+
+    # Hands compare by strength alone, which orders them exactly like comparing
+    # category, then category rank, then each kicker in turn.
 
     def __eq__(self, other):
-        return (
-                self.category == other.category and
-                self.categoryRank == other.categoryRank and
-                self.kicker == other.kicker
-                )
+        return self.strength == other.strength
+
+    def __hash__(self):
+        return self.strength
 
     def __lt__(self, other):
-        # Compare categories first
-        if (self.category != other.category):
-            return self.category < other.category
-        # If categories are the same, compare the category highest rank
-        if (self.categoryRank != other.categoryRank):
-            return self.categoryRank < other.categoryRank
-        # If the category highest ranks are the same, compare the first nonidentical kicker element
-        if (self.kicker != other.kicker):
-            for i in range(len(self.kicker)):
-                if self.kicker[i] != other.kicker[i]:
-                    return self.kicker[i] < other.kicker[i]
-        # If the category and kicker are equal, the hands are equal, not less
-        # than. Return false.
-        return False
+        return self.strength < other.strength
+
+    def __gt__(self, other):
+        return self.strength > other.strength
+
+    def __le__(self, other):
+        return self.strength <= other.strength
+
+    def __ge__(self, other):
+        return self.strength >= other.strength
 
     def __str__(self):
         if (self.kicker is None):
@@ -484,6 +640,55 @@ class PokerHand(object):
         return f'{self.category} ( {self.categoryRank} ) | kicker: {kickerString} | cards: {cardString}'
 
 
+def lazyProperty(function):
+    """ A read-only property worked out the first time it is read and kept in
+    the instance's __dict__ (functools.cached_property needs Python 3.8) """
+    name = '_' + function.__name__
+    def get(self):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            value = self.__dict__[name] = function(self)
+            return value
+    return property(get, doc=function.__doc__)
+
+class LazyPokerHand(PokerHand):
+    """ A PokerHand that only evaluates the strength of its cards when it is
+    made, which is all that comparing hands needs. The chosen cards, category,
+    category rank, kicker and description are worked out the first time they
+    are used and kept. """
+    def __init__(self, cards, strength=None):
+        if (cards == None or len(cards) < 5):
+            raise TypeError('Must have at least 5 cards to make a Poker Hand')
+        self.allCards = cards
+        self.strength = strength or evaluateCodes([c.code for c in cards])
+
+    @lazyProperty
+    def cards(self):
+        if len(self.allCards) == 5:
+            return orderHandCards(list(self.allCards), self.strength)
+        return orderHandCards(chooseCards(self.allCards, self.strength), self.strength)
+
+    @lazyProperty
+    def category(self):
+        return self.determineCategory()
+
+    @lazyProperty
+    def categoryRank(self):
+        return self.determineCategoryRank()
+
+    @lazyProperty
+    def kicker(self):
+        return self.determineKicker()
+
+    @lazyProperty
+    def description(self):
+        return PokerHand.__str__(self)
+
+    def __str__(self):
+        return self.description
+
+
 class Deck(object):
     """ A deck of cards supporting pulling cards from the top of the deck and
     shuffling the deck.
@@ -514,11 +719,7 @@ class Deck(object):
 
     @classmethod
     def getStandardSortedDeck(cls):
-        cards = []
-        for s in Suit:
-            for r in Rank:
-                cards.append(Card(r,s))
-        return cards
+        return list(standardSortedDeck)
 
     def __str__(self):
         maxPerLine = len(self.cards) // 5
@@ -529,3 +730,53 @@ class Deck(object):
                 range(0, len(self.cards), maxPerLine)]
                 )
 
+
+class CodeDeck(object):
+    """ A deck of card codes for simulations, dealt with a partial Fisher-Yates
+    shuffle: each card drawn is swapped in from a random position among the
+    cards not yet drawn, so dealing only touches the cards drawn and the deck
+    never needs shuffling up front. reset() returns every dealt card to the
+    deck without allocating. Takes an explicit random.Random (or any object
+    with a random() method) or a seed, so runs are reproducible. """
+
+    def __init__(self, codes=None, rng=None, seed=None):
+        if codes is None:
+            codes = [c.code for c in standardSortedDeck]
+        self.codes = array('I', codes)
+        self.rng = rng or Random(seed)
+        self.dead = 0
+        self.dealt = 0
+
+    def __len__(self):
+        return len(self.codes) - self.dealt
+
+    def reset(self):
+        """ Returns all dealt cards, except removed ones, to the deck """
+        self.dealt = self.dead
+
+    def removeCards(self, codes):
+        """ Takes the given card codes out of the deck until it is rebuilt,
+        e.g. hole cards and board cards that are known. The deck is reset. """
+        self.reset()
+        deck = self.codes
+        for code in codes:
+            i = deck.index(code, self.dead)
+            deck[self.dead], deck[i] = deck[i], deck[self.dead]
+            self.dead += 1
+        self.dealt = self.dead
+
+    def deal(self, numCards=1):
+        """ Returns a list of numCards random card codes and removes them from
+        the deck """
+        deck = self.codes
+        start = self.dealt
+        remaining = len(deck) - start
+        if (numCards > remaining):
+            raise ValueError('Not enough cards to draw from this deck.')
+        random = self.rng.random
+        for i in range(start, start + numCards):
+            j = i + int(random() * remaining)
+            deck[i], deck[j] = deck[j], deck[i]
+            remaining -= 1
+        self.dealt = start + numCards
+        return deck[start:self.dealt].tolist()
@@ -0,0 +1,94 @@
+import numpy as np
+import Poker
+from Poker import Card
+
+# Batch evaluation
+#
+# Evaluates arrays of hands at once with the same tables as Poker.evaluateFive,
+# evaluateSix and evaluateSeven. Each row of the input holds the card codes
+# (Card.code) of one hand. The tables are wrapped as numpy arrays without
+# copying, so the lookups are gathers from the memory-mapped table file.
+
+batchChunkSize = 1 << 18
+
+rankKeyArray = np.array(Poker.RANK_KEYS, dtype=np.int64)
+# Suit counter increment indexed by the 4 suit bits of a card code.
+suitCounterArray = np.zeros(16, dtype=np.int64)
+for i in range(4):
+    suitCounterArray[1 << i] = 1 << (4 * i)
+
+tableArrays = None
+
+def loadTableArrays():
+    global tableArrays
+    if Poker.handClasses is None:
+        Poker.loadTables()
+    tableArrays = {
+            'flush' : np.frombuffer(Poker.flushTable, dtype=np.uint16),
+            'unique' : np.frombuffer(Poker.uniqueTable, dtype=np.uint16),
+            'productKeys' : np.frombuffer(Poker.productKeys, dtype=np.uint32),
+            'productStrengths' : np.frombuffer(Poker.productStrengths, dtype=np.uint16),
+            6 : np.frombuffer(Poker.sixTable, dtype=np.uint16),
+            7 : np.frombuffer(Poker.sevenTable, dtype=np.uint16),
+            'categories' : np.array([0] + [c[0].value for c in Poker.handClasses[1:]],
+                dtype=np.uint8)
+            }
+    return tableArrays
+
+def encodeHands(hands):
+    """ Converts a list of hands given as lists of card strings, as returned by
+    createSampleHands, to an (N, C) array of card codes """
+    return np.array([[Card(c).code for c in hand] for hand in hands], dtype=np.int64)
+
+def evaluateFiveBatch(codes):
+    tables = tableArrays
+    ranks = np.bitwise_or.reduce(codes, axis=1) >> 16
+    strengths = tables['unique'][ranks]
+
+    flush = np.bitwise_and.reduce(codes, axis=1) & 0xF000 != 0
+    strengths[flush] = tables['flush'][ranks[flush]]
+
+    paired = strengths == 0
+    products = np.prod(codes[paired] & 0xFF, axis=1)
+    strengths[paired] = tables['productStrengths'][
+            np.searchsorted(tables['productKeys'], products)]
+    return strengths
+
+def evaluateManyBatch(codes):
+    """ 6 and 7 cards, see the evaluation keys in Poker """
+    tables = tableArrays
+    keys = (rankKeyArray[(codes >> 8) & 0xF].sum(axis=1) +
+            suitCounterArray[(codes >> 12) & 0xF].sum(axis=1) * (1 << 24) +
+            Poker.FLUSH_BIAS)
+    strengths = tables[codes.shape[1]][keys & Poker.RANK_KEY_MASK]
+
+    flushRows = np.nonzero(keys & Poker.FLUSH_CHECK)[0]
+    if len(flushRows):
+        flushBits = (keys[flushRows] & Poker.FLUSH_CHECK) >> 27
+        # One bit of flushBits is set, every 4th bit from bit 0; it becomes
+        # the suit bit of the card codes.
+        suitBits = np.zeros(len(flushRows), dtype=np.int64)
+        for i in range(4):
+            suitBits[flushBits == 1 << (4 * i)] = 1 << (12 + i)
+        flushCodes = codes[flushRows]
+        ranks = np.bitwise_or.reduce(
+                np.where(flushCodes & suitBits[:, None], flushCodes >> 16, 0), axis=1)
+        strengths[flushRows] = tables['flush'][ranks]
+    return strengths
+
+def evaluateBatch(codes):
+    """ Evaluates an (N, 5), (N, 6) or (N, 7) integer array of card codes.
+    Returns an (N,) array of strengths and an (N,) array of category values
+    (PokerHandCategory.value) of the best 5-card hand of each row. """
+    codes = np.asarray(codes, dtype=np.int64)
+    if codes.ndim != 2 or codes.shape[1] not in (5, 6, 7):
+        raise ValueError('Card codes must be an (N, 5), (N, 6) or (N, 7) array')
+    if tableArrays is None:
+        loadTableArrays()
+    evaluate = evaluateFiveBatch if codes.shape[1] == 5 else evaluateManyBatch
+
+    strengths = np.empty(len(codes), dtype=np.uint16)
+    for start in range(0, len(codes), batchChunkSize):
+        strengths[start:start + batchChunkSize] = evaluate(
+                codes[start:start + batchChunkSize])
+    return strengths, tableArrays['categories'][strengths]
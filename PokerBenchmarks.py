@@ -0,0 +1,165 @@
+from contextlib import redirect_stdout
+from time import perf_counter
+import argparse
+import io
+import json
+import platform
+import sys
+import tracemalloc
+from Poker import *
+from BroadPokerTests import *
+from PokerHandSimulation import *
+
+# Benchmarks
+#
+# Each benchmark takes a workload size and a seed, prepares its inputs and
+# returns a function running the workload along with the number of hands it
+# handles. Inputs are generated from the seed, so every run measures the same
+# work. Functions that print have their output discarded.
+
+benchmarkSeed = 2018
+
+def benchParsing(size, seed):
+    hands = createSampleHands(size, 7, seed)
+    def run():
+        for hand in hands:
+            parseCards(hand)
+    return run, size
+
+def benchFiveCardHands(size, seed):
+    hands = [parseCards(h) for h in createSampleHands(size, 5, seed)]
+    def run():
+        for hand in hands:
+            PokerHand(list(hand))
+    return run, size
+
+def benchSevenCardHands(size, seed):
+    hands = [parseCards(h) for h in createSampleHands(size, 7, seed)]
+    def run():
+        for hand in hands:
+            PokerHand(hand)
+    return run, size
+
+def benchLazySevenCardHands(size, seed, players=6):
+    hands = [parseCards(h) for h in createSampleHands(size, 7, seed)]
+    def run():
+        for i in range(0, len(hands), players):
+            max(LazyPokerHand(h) for h in hands[i:i + players])
+    return run, size
+
+def benchShowdowns(size, seed, players=6):
+    tables = size // players
+    hands = createSampleHands(tables * players, 7, seed)
+    def run():
+        with redirect_stdout(io.StringIO()):
+            for i in range(0, len(hands), players):
+                whoIsTheWinner(hands[i:i + players])
+    return run, tables * players
+
+def benchDealing(size, seed):
+    deck = CodeDeck(seed=seed)
+    def run():
+        for _ in range(size):
+            deck.reset()
+            deck.deal(7)
+    return run, size
+
+def benchTournaments(size, seed, players=5):
+    tournaments = size // players
+    def run():
+        with redirect_stdout(io.StringIO()):
+            runPokerTournaments(tournaments, players, 7, seed)
+    return run, tournaments * players
+
+benchmarks = {
+        'parse' : benchParsing,
+        'evaluate5' : benchFiveCardHands,
+        'bestHand7' : benchSevenCardHands,
+        'compare7' : benchLazySevenCardHands,
+        'showdown' : benchShowdowns,
+        'deal' : benchDealing,
+        'tournament' : benchTournaments
+        }
+
+def runBenchmark(name, size, repeat=3, seed=benchmarkSeed):
+    """ Runs a benchmark repeat times and keeps the fastest run. Peak memory is
+    measured in a separate run, as tracing allocations slows it down. """
+    run, hands = benchmarks[name](size, seed)
+    run()
+    seconds = float('inf')
+    for _ in range(repeat):
+        started = perf_counter()
+        run()
+        seconds = min(seconds, perf_counter() - started)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+            'name' : name,
+            'hands' : hands,
+            'seconds' : seconds,
+            'handsPerSecond' : hands / seconds,
+            'peakMemoryBytes' : peak
+            }
+
+def runBenchmarks(names=None, size=20000, repeat=3, seed=benchmarkSeed):
+    """ Runs the named benchmarks (all by default). Returns the results as a
+    JSON-serializable dict. """
+    # Load the evaluator tables up front, so the first benchmark does not time it.
+    PokerHand(parseCards(['AH', 'KH', 'QH', 'JH', '10H']))
+    return {
+            'python' : platform.python_version(),
+            'platform' : platform.platform(),
+            'size' : size,
+            'seed' : seed,
+            'results' : [runBenchmark(n, size, repeat, seed) for n in
+                (names or benchmarks.keys())]
+            }
+
+def findRegressions(results, baseline, tolerance=0.1):
+    """ Returns (name, baseline, current) hands per second for benchmarks more
+    than tolerance slower than in the baseline results """
+    before = { r['name'] : r['handsPerSecond'] for r in baseline['results'] }
+    return [(r['name'], before[r['name']], r['handsPerSecond'])
+            for r in results['results'] if r['name'] in before and
+            r['handsPerSecond'] < before[r['name']] * (1 - tolerance)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Poker package.')
+    parser.add_argument('benchmarks', nargs='*',
+            help='benchmarks to run, all by default: ' + ', '.join(benchmarks))
+    parser.add_argument('--size', type=int, default=20000,
+            help='hands per benchmark')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=benchmarkSeed)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run; exit '
+            'with status 1 if a benchmark got slower')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+            help='slowdown allowed by --compare, as a fraction')
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in benchmarks:
+            parser.error(f'unknown benchmark {name}')
+
+    results = runBenchmarks(args.benchmarks, args.size, args.repeat, args.seed)
+    for r in results['results']:
+        print(f"{r['name']:<12} {r['handsPerSecond']:>12.0f} hands/s "
+                f"{r['peakMemoryBytes'] / 1024:>10.0f} KiB peak")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = findRegressions(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f'REGRESSION {name}: {before:.0f} -> {after:.0f} hands/s')
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
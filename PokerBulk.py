@@ -0,0 +1,142 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import argparse
+import csv
+import json
+import os
+import sys
+from BroadPokerTests import handResults
+
+# Bulk evaluation
+#
+# Streams hands from a file or stdin, one per line, either as JSON arrays of
+# card strings (Ex: ["JH", "4C", "4S", "JC", "9H"]) or as comma separated
+# card strings (Ex: JH,4C,4S,JC,9H). Lines are read in chunks that are parsed
+# and evaluated in worker processes, and the results are written in the order
+# of the input, one line per hand:
+#
+#   jsonl: {"category": "TWO_PAIR", "strength": 4562, "cards": ["JH", ...]}
+#   csv:   TWO_PAIR,4562,JH,JC,9H,4C,4S
+#
+# A line that is not a valid hand gets an error in its place instead:
+#
+#   jsonl: {"line": 12, "error": "..."}
+#   csv:   ERROR,12,...
+#
+# Only a few chunks are in flight at once, so memory use does not grow with
+# the size of the input.
+
+def parseLine(line, format):
+    if format == 'csv':
+        return [c.strip() for c in next(csv.reader([line])) if c.strip()]
+    cards = json.loads(line)
+    if not isinstance(cards, list) or not all(isinstance(c, str) for c in cards):
+        raise ValueError('Expected a JSON array of card strings')
+    return cards
+
+def formatResult(result, format):
+    if format == 'csv':
+        return str.join(',', [result['category'], str(result['strength'])] +
+                result['cards'])
+    return json.dumps({ 'category' : result['category'],
+        'strength' : result['strength'], 'cards' : result['cards'] })
+
+def formatError(lineNumber, error, format):
+    message = f'{type(error).__name__}: {error}'
+    if format == 'csv':
+        return str.join(',', ['ERROR', str(lineNumber), json.dumps(message)])
+    return json.dumps({ 'line' : lineNumber, 'error' : message })
+
+def evaluateChunk(lines, format):
+    """ Returns the output text of a chunk of (line number, line) """
+    output = [None] * len(lines)
+    hands = []
+    indexes = []
+    for i, (lineNumber, line) in enumerate(lines):
+        try:
+            hands.append(parseLine(line, format))
+            indexes.append(i)
+        except Exception as e:
+            output[i] = formatError(lineNumber, e, format)
+    try:
+        results = handResults(hands)
+    except Exception:
+        # Evaluate the hands one by one to find the bad ones.
+        results = []
+        for hand in hands:
+            try:
+                results.append(handResults([hand])[0])
+            except Exception as e:
+                results.append(e)
+    for i, result in zip(indexes, results):
+        if isinstance(result, Exception):
+            output[i] = formatError(lines[i][0], result, format)
+        else:
+            output[i] = formatResult(result, format)
+    return str.join('\n', output) + '\n' if output else ''
+
+def readChunks(lines, chunkSize):
+    """ Yields chunks of (line number, line) of the non-blank input lines """
+    numbered = ((n, l) for n, l in enumerate(lines, 1) if l.strip())
+    while True:
+        chunk = list(islice(numbered, chunkSize))
+        if not chunk:
+            return
+        yield chunk
+
+def evaluateStream(lines, output, format='jsonl', chunkSize=10000, workers=None):
+    """ Evaluates every hand of an iterable of input lines, writing one result
+    line per hand to the output file. Returns the number of hands. """
+    chunks = readChunks(lines, chunkSize)
+    count = 0
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for chunk in chunks:
+            output.write(evaluateChunk(chunk, format))
+            count += len(chunk)
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a couple of chunks queued per worker, and write the results of
+        # the oldest chunk before reading another one.
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(evaluateChunk, chunk, format))
+            count += len(chunk)
+            if len(pending) >= 2 * workers:
+                output.write(pending.popleft().result())
+        while pending:
+            output.write(pending.popleft().result())
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluates a stream of poker '
+            'hands, one JSON array or comma separated line of cards per hand.')
+    parser.add_argument('input', nargs='?', default='-',
+            help='input file (default: stdin)')
+    parser.add_argument('-o', '--output', default='-',
+            help='output file (default: stdout)')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default=None,
+            help='input and output format (default: csv for .csv files, '
+            'jsonl otherwise)')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+            help='hands per chunk sent to a worker')
+    parser.add_argument('--workers', type=int, default=None,
+            help='worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+    format = args.format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+
+    input = sys.stdin if args.input == '-' else open(args.input, newline='')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        count = evaluateStream(input, output, format, args.chunk_size, args.workers)
+    finally:
+        if input is not sys.stdin:
+            input.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f'{count} hands evaluated', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from functools import wraps
+from Poker import *
+from PokerEquity import exactEquity
+
+# Suit isomorphism
+#
+# Relabeling the suits of every card of a situation does not change any
+# strength or equity, so situations that only differ by a permutation of the
+# suits can share one cached result. A situation is a list of card groups with
+# different roles, e.g. a board and each player's hole cards. Each suit is
+# described by the ranks it holds in each group, as a tuple of rank bit masks,
+# and sorting the 4 suit descriptions gives a key that is the same for every
+# relabeling. The 22100 flops have 1755 keys, for example.
+
+def suitDescriptions(groups):
+    """ Returns, for each suit index, the rank bit masks of the suit in each
+    group of cards (Cards, strings or card codes) """
+    descriptions = [[0] * len(groups) for _ in SUITS]
+    for g, group in enumerate(groups):
+        codes = group if all(isinstance(c, int) for c in group) else cardCodes(group)
+        for c in codes:
+            descriptions[((c >> 12) & 0xF).bit_length() - 1][g] |= 1 << ((c >> 8) & 0xF)
+    return [tuple(d) for d in descriptions]
+
+def canonicalKey(groups):
+    """ Returns a key that is equal for two lists of card groups if and only if
+    they are the same up to a permutation of the suits """
+    return tuple(sorted(suitDescriptions(groups), reverse=True))
+
+def canonicalGroups(groups):
+    """ Returns the groups with their suits relabeled to the canonical order:
+    the suit of the largest description becomes the first suit, and so on """
+    descriptions = suitDescriptions(groups)
+    order = sorted(range(len(SUITS)), key=lambda s: descriptions[s], reverse=True)
+    newSuits = { SUITS[s] : SUITS[i] for i, s in enumerate(order) }
+    return [[cardsByRankAndSuit[(c.rank, newSuits[c.suit])] for c in
+        (cardsByCode[x] for x in (group if all(isinstance(c, int) for c in group)
+            else cardCodes(group)))] for group in groups]
+
+# Memoization
+#
+# A cache of bounded size that evicts the least recently used entry (lru) or
+# the least frequently used one (lfu, the oldest among equally used entries).
+# Both policies take constant time per lookup: lfu keeps one ordered dict of
+# keys per use count and remembers the smallest count.
+
+class MemoCache(object):
+    def __init__(self, maxSize=100000, policy='lru'):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f'Unknown cache policy {policy!r}')
+        self.maxSize = maxSize
+        self.policy = policy
+        self.values = OrderedDict()
+        self.counts = {}
+        self.keysByCount = {}
+        self.minCount = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        if key not in self.values:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.policy == 'lru':
+            self.values.move_to_end(key)
+        else:
+            count = self.counts[key]
+            del self.keysByCount[count][key]
+            if not self.keysByCount[count]:
+                del self.keysByCount[count]
+                if self.minCount == count:
+                    self.minCount = count + 1
+            self.counts[key] = count + 1
+            self.keysByCount.setdefault(count + 1, OrderedDict())[key] = None
+        return self.values[key]
+
+    def put(self, key, value):
+        if key in self.values:
+            self.values[key] = value
+            return
+        if len(self.values) >= self.maxSize:
+            self.evict()
+        self.values[key] = value
+        if self.policy == 'lfu':
+            self.counts[key] = 1
+            self.keysByCount.setdefault(1, OrderedDict())[key] = None
+            self.minCount = 1
+
+    def evict(self):
+        self.evictions += 1
+        if self.policy == 'lru':
+            self.values.popitem(last=False)
+            return
+        keys = self.keysByCount[self.minCount]
+        key, _ = keys.popitem(last=False)
+        if not keys:
+            del self.keysByCount[self.minCount]
+        del self.counts[key]
+        del self.values[key]
+
+    def clear(self):
+        self.__init__(self.maxSize, self.policy)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+                'size' : len(self.values),
+                'maxSize' : self.maxSize,
+                'policy' : self.policy,
+                'hits' : self.hits,
+                'misses' : self.misses,
+                'evictions' : self.evictions,
+                'hitRate' : self.hits / lookups if lookups else 0.0
+                }
+
+def memoize(key, cache=None):
+    """ Decorates a function to cache its results in a MemoCache under
+    key(*args, **kwargs). The cache is available as function.cache. """
+    cache = cache if cache is not None else MemoCache()
+    missing = object()
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            result = cache.get(k, missing)
+            if result is missing:
+                result = function(*args, **kwargs)
+                cache.put(k, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+@memoize(lambda cards: canonicalKey([cards]))
+def cachedStrength(cards):
+    """ The strength of the best hand of 5 or more cards, cached by suit
+    isomorphism """
+    return evaluateCodes(cardCodes(cards) if not all(isinstance(c, int)
+        for c in cards) else list(cards))
+
+@memoize(lambda players, board=None, deadCards=None:
+        canonicalKey([board or [], deadCards or []] + list(players)))
+def cachedExactEquity(players, board=None, deadCards=None):
+    """ exactEquity, cached by suit isomorphism. The cached EquityResults are
+    shared, so they should not be modified. """
+    return exactEquity(players, board, deadCards)
@@ -0,0 +1,208 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+from math import sqrt
+from time import perf_counter
+import os
+import random
+import Poker
+from Poker import *
+
+def remainingDeck(*usedCards):
+    """ Returns the codes of a standard deck without the given card codes.
+    Raises a ValueError if a card is used twice. """
+    used = [c for cards in usedCards for c in cards]
+    if len(set(used)) != len(used):
+        raise ValueError('The same card cannot be dealt twice.')
+    return [c.code for c in Deck.getStandardSortedDeck() if c.code not in used]
+
+class EquityResult(object):
+    """ Outcome of an equity calculation for one player. Equity counts a win
+    as 1 and an N-way tie as 1/N. """
+    def __init__(self, wins, ties, losses, equitySum, equitySquares, seconds,
+            seed=None):
+        self.iterations = wins + ties + losses
+        self.win = wins / self.iterations
+        self.tie = ties / self.iterations
+        self.loss = losses / self.iterations
+        self.equity = equitySum / self.iterations
+        variance = max(equitySquares / self.iterations - self.equity ** 2, 0)
+        self.standardError = sqrt(variance / self.iterations)
+        self.seconds = seconds
+        self.iterationsPerSecond = self.iterations / seconds if seconds else 0
+        self.seed = seed
+
+    def __str__(self):
+        return (f'equity: {self.equity:.4f} (+/- {self.standardError:.4f}) | '
+                f'win: {self.win:.4f} tie: {self.tie:.4f} loss: {self.loss:.4f} | '
+                f'{self.iterations} iterations, {self.iterationsPerSecond:.0f}/s')
+
+def simulateBatch(hero, board, deck, opponents, iterations, seed):
+    """ Deals iterations random runouts and opponent hands from deck. Returns
+    wins, ties, losses, and the sum and sum of squares of the equity. """
+    deck = CodeDeck(deck, seed=seed)
+    evaluate = evaluateSeven
+    missing = 5 - len(board)
+    drawCount = missing + 2 * opponents
+    wins = ties = losses = 0
+    equitySum = equitySquares = 0.0
+
+    for _ in range(iterations):
+        deck.reset()
+        drawn = deck.deal(drawCount)
+        full = board + drawn[:missing]
+        heroStrength = evaluate(*hero, *full)
+        winners = 1
+        for i in range(missing, drawCount, 2):
+            strength = evaluate(drawn[i], drawn[i + 1], *full)
+            if strength > heroStrength:
+                winners = 0
+                break
+            if strength == heroStrength:
+                winners += 1
+
+        if winners == 0:
+            losses += 1
+        elif winners == 1:
+            wins += 1
+            equitySum += 1
+            equitySquares += 1
+        else:
+            ties += 1
+            equitySum += 1 / winners
+            equitySquares += 1 / winners ** 2
+
+    return wins, ties, losses, equitySum, equitySquares
+
+def monteCarloEquity(holeCards, opponents=1, board=None, deadCards=None,
+        iterations=100000, targetStandardError=None, seed=None, workers=None,
+        batchSize=10000, minIterations=1000):
+    """ Estimates the hold'em equity of holeCards against a number of opponents
+    holding random cards, given an optional partial board and dead cards that
+    cannot be dealt.
+
+    The iterations are split into batches of batchSize, each simulated with its
+    own seed derived from seed, across a pool of worker processes (in-process if
+    workers is 1). Batches are combined in order, so a seed gives the same
+    result whatever the number of workers. With targetStandardError, stops after
+    the first batch that brings the standard error of the equity below it,
+    once at least minIterations have run so the estimate can be trusted. """
+    hero = cardCodes(holeCards)
+    board = cardCodes(board)
+    if len(hero) != 2:
+        raise ValueError('Hold\'em hands have exactly 2 hole cards.')
+    if len(board) > 5:
+        raise ValueError('The board has at most 5 cards.')
+    deck = remainingDeck(hero, board, cardCodes(deadCards))
+    if len(deck) < 5 - len(board) + 2 * opponents:
+        raise ValueError('Not enough cards to deal to every opponent.')
+    if seed is None:
+        seed = random.randrange(2**63)
+
+    batches = [(hero, board, deck, opponents, min(batchSize, iterations - start),
+        f'{seed}:{i}') for i, start in enumerate(range(0, iterations, batchSize))]
+    totals = [0, 0, 0, 0.0, 0.0]
+    started = perf_counter()
+
+    def addBatch(result):
+        for i, value in enumerate(result):
+            totals[i] += value
+        return (targetStandardError is not None and
+                sum(totals[:3]) >= minIterations and
+                EquityResult(*totals, 1).standardError < targetStandardError)
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for batch in batches:
+            if addBatch(simulateBatch(*batch)):
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a couple of batches queued per worker, so stopping early
+            # leaves little work to cancel.
+            remaining = iter(batches)
+            pending = deque(executor.submit(simulateBatch, *b) for b in
+                    islice(remaining, 2 * workers))
+            while pending:
+                if addBatch(pending.popleft().result()):
+                    break
+                batch = next(remaining, None)
+                if batch is not None:
+                    pending.append(executor.submit(simulateBatch, *batch))
+            for future in pending:
+                future.cancel()
+
+    return EquityResult(*totals, perf_counter() - started, seed)
+
+def exactEquity(players, board=None, deadCards=None):
+    """ Computes the exact hold'em equity of each player's hole cards by
+    enumerating every runout of the remaining board cards. Returns a list of
+    EquityResults in the order of players.
+
+    The evaluation keys of each player's hole cards and the known board are
+    added up once; a runout only adds the keys of its own cards, and only the
+    rank bits of a suit with 5 or more cards are gathered for flushes. """
+    hands = [cardCodes(p) for p in players]
+    board = cardCodes(board)
+    if any(len(h) != 2 for h in hands):
+        raise ValueError('Hold\'em hands have exactly 2 hole cards.')
+    if len(board) > 5:
+        raise ValueError('The board has at most 5 cards.')
+    deck = remainingDeck(board, cardCodes(deadCards), *hands)
+    if Poker.handClasses is None:
+        Poker.loadTables()
+
+    started = perf_counter()
+    keys = Poker.evaluationKeys
+    sevenTable = Poker.sevenTable
+    flushTable = Poker.flushTable
+    playerKeys = []
+    playerSuitRanks = []
+    for hand in hands:
+        playerKeys.append(sum(keys[c] for c in hand + board) + FLUSH_BIAS)
+        suitRanks = { 1 << (12 + i) : 0 for i in range(4) }
+        for c in hand + board:
+            suitRanks[c & 0xF000] |= c >> 16
+        playerSuitRanks.append(suitRanks)
+
+    playerCount = len(hands)
+    wins = [0] * playerCount
+    ties = [0] * playerCount
+    equitySums = [0.0] * playerCount
+    equitySquares = [0.0] * playerCount
+    runouts = 0
+    for runout in combinations(deck, 5 - len(board)):
+        runouts += 1
+        runoutKey = sum(keys[c] for c in runout)
+        strengths = []
+        for key, suitRanks in zip(playerKeys, playerSuitRanks):
+            key += runoutKey
+            flush = key & FLUSH_CHECK
+            if flush:
+                s = flushSuitBits[flush]
+                ranks = suitRanks[s]
+                for c in runout:
+                    if c & s:
+                        ranks |= c >> 16
+                strengths.append(flushTable[ranks])
+            else:
+                strengths.append(sevenTable[key & RANK_KEY_MASK])
+
+        best = max(strengths)
+        winners = [i for i in range(playerCount) if strengths[i] == best]
+        share = 1 / len(winners)
+        for i in winners:
+            if len(winners) == 1:
+                wins[i] += 1
+            else:
+                ties[i] += 1
+            equitySums[i] += share
+            equitySquares[i] += share * share
+
+    seconds = perf_counter() - started
+    results = [EquityResult(wins[i], ties[i], runouts - wins[i] - ties[i],
+        equitySums[i], equitySquares[i], seconds) for i in range(playerCount)]
+    # Every runout was counted, there is no sampling error.
+    for result in results:
+        result.standardError = 0.0
+    return results
@@ -1,5 +1,6 @@
 from Poker import *
 from BroadPokerTests import *
+from PokerSampling import sampleCategoryHands
 from string import Template
 
 ##    HIGH_CARD = 1
@@ -14,23 +15,25 @@ from string import Template
 ##    ROYAL_FLUSH = 10
 
 def generatePokerHands(minRank = 1, cardsToDraw = 5, handsToGenerate = 100):
-    deck = Deck()
+    if cardsToDraw == 5:
+        # Draw straight from the wanted categories instead of throwing hands
+        # away; the hands are just as likely as with the loop below.
+        categories = [c for c in PokerHandCategory if c.value >= minRank]
+        for cards in sampleCategoryHands(categories, handsToGenerate):
+            print(LazyPokerHand(cards))
+        return
+    deck = CodeDeck()
     handsPrinted = 0
     while handsPrinted < handsToGenerate:
-        try:
-            pokerHand = PokerHand(deck.takeCards(cardsToDraw))
-            if(pokerHand.category.value >= minRank):
-                print(pokerHand)
-                handsPrinted +=1
-        except ValueError:
-            deck = Deck()
-            pokerHand = PokerHand(deck.takeCards(cardsToDraw))
-            if(pokerHand.category.value >= minRank):
-                print(pokerHand)
-                handsPrinted +=1
+        if len(deck) < cardsToDraw:
+            deck.reset()
+        pokerHand = LazyPokerHand([cardsByCode[c] for c in deck.deal(cardsToDraw)])
+        if(pokerHand.category.value >= minRank):
+            print(pokerHand)
+            handsPrinted +=1
 
-def runPokerTournaments(tournaments = 10, players = 5, cardsToDraw = 7):
-    playerHands = createSampleHands(tournaments * players, 7)
+def runPokerTournaments(tournaments = 10, players = 5, cardsToDraw = 7, seed = None):
+    playerHands = createSampleHands(tournaments * players, cardsToDraw, seed)
     for i in range(tournaments):
         roundHands = playerHands[i * players : i * players + players]
         roundPlayers = { 'Player' + str(j+1) : roundHands[j] for j in
@@ -0,0 +1,84 @@
+import Poker
+from Poker import *
+
+# Incremental hand state
+#
+# Follows a hand as its cards arrive (hole cards, flop, turn, river) without
+# evaluating it from scratch after every street. Each added card updates the
+# sum of evaluation keys, which holds the rank multiset and the suit counts,
+# and the rank bits of its suit, which is all the 6 and 7-card lookups need,
+# so the strength of the current cards is one table lookup away after every
+# card. The strength with one more card is just as cheap, which is how outs
+# are counted.
+
+class HandState(object):
+    def __init__(self, cards=None):
+        if Poker.handClasses is None:
+            Poker.loadTables()
+        self.codes = []
+        # Sum of the evaluation keys of the cards, biased so a suit with 5 or
+        # more cards sets its flush bit
+        self.key = FLUSH_BIAS
+        # Rank bits of the cards of each suit, by card code suit bit
+        self.suitRanks = { 1 << (12 + i) : 0 for i in range(len(SUITS)) }
+        self.strength = None
+        for c in cardCodes(cards):
+            self.addCode(c)
+
+    def addCard(self, card):
+        """ Adds a Card or a card string (Ex: 'AH') """
+        self.addCode(card.code if isinstance(card, Card) else Card(card).code)
+
+    def addCode(self, code):
+        if code in self.codes:
+            raise ValueError('The same card cannot be dealt twice.')
+        self.codes.append(code)
+        self.key += evaluationKeys[code]
+        self.suitRanks[code & 0xF000] |= code >> 16
+        self.strength = self.strengthWith(None) if len(self.codes) >= 5 else None
+
+    def strengthWith(self, code):
+        """ Returns the strength of the current cards plus one more card code
+        (or none), for a total of 5 to 7 cards """
+        count = len(self.codes) + (code is not None)
+        if count == 5:
+            return evaluateFive(*self.codes, *([code] if code is not None else []))
+        if count > 7:
+            return evaluateCodes(self.codes + ([code] if code is not None else []))
+        key = self.key + (evaluationKeys[code] if code is not None else 0)
+        flush = key & FLUSH_CHECK
+        if flush:
+            s = flushSuitBits[flush]
+            ranks = self.suitRanks[s]
+            if code is not None and code & s:
+                ranks |= code >> 16
+            return Poker.flushTable[ranks]
+        table = Poker.sixTable if count == 6 else Poker.sevenTable
+        return table[key & RANK_KEY_MASK]
+
+    @property
+    def cards(self):
+        return [cardsByCode[c] for c in self.codes]
+
+    def category(self):
+        """ The category of the best hand so far, or None before 5 cards """
+        if self.strength is None:
+            return None
+        return Poker.handClasses[self.strength][0]
+
+    def bestHand(self):
+        """ The best PokerHand of the cards so far """
+        if self.strength is None:
+            raise TypeError('Must have at least 5 cards to make a Poker Hand')
+        return PokerHand(self.cards, self.strength)
+
+    def outs(self, deadCards=None):
+        """ Returns the cards that would improve the category of the hand if
+        they came next, leaving out the given dead cards (Ex: the other
+        players' hole cards) """
+        if not 5 <= len(self.codes) <= 6:
+            raise ValueError('Outs are counted with 5 or 6 cards.')
+        seen = set(self.codes + cardCodes(deadCards))
+        category = self.category()
+        return [c for c in standardSortedDeck if c.code not in seen and
+                Poker.handClasses[self.strengthWith(c.code)][0] > category]
@@ -0,0 +1,175 @@
+from array import array
+import mmap
+import os
+import struct
+from Poker import *
+from PokerIndex import cardNumbersByCode, cardsByNumber, cardNumberArrays
+
+# Hand history files
+#
+# Stores dealt hands in columns of fixed width, each aligned to 8 bytes after
+# the header:
+#
+#   cards       count x cardsPerHand bytes, the card number (0-51, see
+#               PokerIndex) of each card of each hand
+#   strengths   count x uint16, optional
+#   categories  count x uint8 PokerHandCategory values, optional
+#
+# A hand takes one byte per card instead of a list of strings, and a reader
+# memory maps the file: columns are numpy views of the mapped file, and hands
+# only become Cards when they are asked for.
+
+HISTORY_FILE_MAGIC = b'PKHH'
+HISTORY_FILE_VERSION = 1
+HISTORY_FILE_HEADER = struct.Struct('<4sIIIQ')
+HAS_STRENGTHS = 1
+HAS_CATEGORIES = 2
+
+def historyColumns(count, cardsPerHand, flags):
+    """ Returns [(name, typecode, offset, size)] of the columns of a file """
+    columns = []
+    start = HISTORY_FILE_HEADER.size + len(padding(HISTORY_FILE_HEADER.size))
+    for name, typecode, width, flag in (('cards', 'B', cardsPerHand, 0),
+            ('strengths', 'H', 2, HAS_STRENGTHS), ('categories', 'B', 1, HAS_CATEGORIES)):
+        if flag and not flags & flag:
+            continue
+        size = count * width
+        columns.append((name, typecode, start, size))
+        start += size + len(padding(size))
+    return columns
+
+def encodeCards(hands):
+    """ Returns the card number bytes of hands given as lists of Cards or card
+    strings, or as an (N, C) numpy array of card codes """
+    if hasattr(hands, 'shape'):
+        import numpy as np
+        numbers, _, _ = cardNumberArrays()
+        codes = np.asarray(hands, dtype=np.int64)
+        return numbers[(codes >> 8) & 0xF, (codes >> 12) & 0xF].astype(np.uint8).tobytes()
+    return bytes(cardNumbersByCode[c.code if isinstance(c, Card) else Card(c).code]
+            for hand in hands for c in hand)
+
+def writeHandHistory(path, hands, strengths=None, categories=None, evaluate=False):
+    """ Writes hands of the same number of cards to a hand history file, with
+    strength and category columns if given. With evaluate, the strengths and
+    categories are computed. Returns the number of hands. """
+    cards = encodeCards(hands)
+    count = len(hands)
+    cardsPerHand = len(cards) // count if count else 0
+    if cardsPerHand * count != len(cards):
+        raise ValueError('Every hand must have the same number of cards.')
+    if evaluate:
+        try:
+            from PokerBatch import evaluateBatch
+            import numpy as np
+        except ImportError:
+            evaluateBatch = None
+        if evaluateBatch is not None and count and 5 <= cardsPerHand <= 7:
+            _, codes, _ = cardNumberArrays()
+            strengths, categories = evaluateBatch(codes[np.frombuffer(cards,
+                dtype=np.uint8).reshape(count, cardsPerHand)])
+        else:
+            strengths = array('H', (evaluateCodes([cardsByNumber[n].code for n in
+                cards[i:i + cardsPerHand]]) for i in range(0, len(cards), cardsPerHand)))
+            categories = array('B', (strengthCategory(s).value for s in strengths))
+
+    flags = (HAS_STRENGTHS if strengths is not None else 0) | (
+            HAS_CATEGORIES if categories is not None else 0)
+    data = { 'cards' : cards }
+    if strengths is not None:
+        data['strengths'] = array('H', [int(s) for s in strengths]).tobytes()
+    if categories is not None:
+        data['categories'] = bytes(int(getattr(c, 'value', c)) for c in categories)
+
+    # Write next to the target and rename, so readers never see a partial file.
+    tempPath = f'{path}.{os.getpid()}.tmp'
+    with open(tempPath, 'wb') as f:
+        header = HISTORY_FILE_HEADER.pack(HISTORY_FILE_MAGIC, HISTORY_FILE_VERSION,
+                cardsPerHand, flags, count)
+        f.write(header + padding(len(header)))
+        for name, _, _, size in historyColumns(count, cardsPerHand, flags):
+            if len(data[name]) != size:
+                raise ValueError(f'Expected {size} bytes of {name}, got {len(data[name])}')
+            f.write(data[name] + padding(size))
+    os.replace(tempPath, path)
+    return count
+
+class HandHistory(object):
+    """ A memory mapped hand history file. Hands are read by index or by
+    iterating, as lists of Cards; with numpy, cardNumbers(), codes(),
+    strengths() and categories() return whole columns as arrays. """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.cardsPerHand, self.flags, self.count = (
+                HISTORY_FILE_HEADER.unpack_from(self.map))
+        if magic != HISTORY_FILE_MAGIC or version != HISTORY_FILE_VERSION:
+            self.map.close()
+            raise ValueError(f'{path} is not a hand history file')
+        self.columns = {}
+        view = memoryview(self.map)
+        for name, typecode, start, size in historyColumns(self.count,
+                self.cardsPerHand, self.flags):
+            self.columns[name] = view[start:start + size].cast(typecode)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not -self.count <= i < self.count:
+            raise IndexError('hand index out of range')
+        start = (i % self.count) * self.cardsPerHand
+        return [cardsByNumber[n] for n in
+                self.columns['cards'][start:start + self.cardsPerHand]]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def strength(self, i):
+        return self.columns['strengths'][i] if 'strengths' in self.columns else None
+
+    def category(self, i):
+        if 'categories' not in self.columns:
+            return None
+        return PokerHandCategory(self.columns['categories'][i])
+
+    def cardNumbers(self):
+        """ An (N, C) uint8 array of card numbers, viewing the file """
+        import numpy as np
+        return np.frombuffer(self.columns['cards'], dtype=np.uint8).reshape(
+                self.count, self.cardsPerHand)
+
+    def codes(self, start=0, stop=None):
+        """ An (N, C) array of the card codes of hands start to stop, e.g. for
+        PokerBatch.evaluateBatch """
+        _, codes, _ = cardNumberArrays()
+        return codes[self.cardNumbers()[start:stop]]
+
+    def strengths(self):
+        """ A uint16 array of the strengths viewing the file, or None """
+        import numpy as np
+        if 'strengths' not in self.columns:
+            return None
+        return np.frombuffer(self.columns['strengths'], dtype=np.uint16)
+
+    def categories(self):
+        """ A uint8 array of the category values viewing the file, or None """
+        import numpy as np
+        if 'categories' not in self.columns:
+            return None
+        return np.frombuffer(self.columns['categories'], dtype=np.uint8)
+
+    def close(self):
+        """ Unmaps the file. Arrays returned by the reader must be deleted
+        first, as they view the mapped memory. """
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
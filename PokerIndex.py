@@ -0,0 +1,90 @@
+from Poker import *
+
+# Hand indexes
+#
+# Numbers the cards of the deck 0 to 51 (13 * suit index + rank index) and
+# every set of k distinct cards by its colexicographic rank: the sum of
+# C(card number, i) over its cards sorted in increasing order, i = 1 to k.
+# Sets of k cards get every index from 0 to C(52, k) - 1 exactly once, e.g.
+# 0 to 2,598,959 for 5 cards and 0 to 133,784,559 for 7, so results keyed by
+# hand can be stored in dense arrays. Unranking takes the largest card c with
+# C(c, k) <= index, subtracts it, and repeats with k - 1.
+
+DECK_SIZE = 52
+cardNumbersByCode = { c.code : 13 * suitIndexes[c.suit] + rankIndexes[c.rank]
+        for c in standardSortedDeck }
+cardsByNumber = [None] * DECK_SIZE
+for c in standardSortedDeck:
+    cardsByNumber[cardNumbersByCode[c.code]] = c
+# binomials[n][k] = C(n, k) for k up to 7, by Pascal's rule
+binomials = [[1] + [0] * 7]
+for n in range(1, DECK_SIZE + 1):
+    binomials.append([1] + [binomials[n - 1][k - 1] + binomials[n - 1][k]
+        for k in range(1, 8)])
+
+def handCount(size):
+    """ The number of sets of size cards, up to 7 """
+    return binomials[DECK_SIZE][size]
+
+def handIndex(cards):
+    """ Returns the index of a set of up to 7 distinct cards, given as Cards,
+    strings (Ex: 'AH') or card codes. The order of the cards does not matter. """
+    numbers = sorted(cardNumbersByCode[c] for c in
+            (cards if all(isinstance(c, int) for c in cards) else cardCodes(cards)))
+    if any(a == b for a, b in zip(numbers, numbers[1:])):
+        raise ValueError('The same card cannot be in a hand twice.')
+    return sum(binomials[n][i] for i, n in enumerate(numbers, 1))
+
+def unrankHand(index, size):
+    """ Returns the Cards of the set of size cards with the given index, in
+    increasing card number order """
+    if not 0 <= index < handCount(size):
+        raise IndexError(f'There are {handCount(size)} sets of {size} cards')
+    cards = []
+    n = DECK_SIZE
+    for k in range(size, 0, -1):
+        n -= 1
+        while binomials[n][k] > index:
+            n -= 1
+        index -= binomials[n][k]
+        cards.append(cardsByNumber[n])
+    return cards[::-1]
+
+# Array forms (requires numpy)
+
+numberArrays = None
+
+def cardNumberArrays():
+    global numberArrays
+    if numberArrays is None:
+        import numpy as np
+        # Card number by rank index and suit bits (code >> 12 & 0xF)
+        numbers = np.zeros((13, 16), dtype=np.int64)
+        for code, number in cardNumbersByCode.items():
+            numbers[(code >> 8) & 0xF, (code >> 12) & 0xF] = number
+        codes = np.array([c.code for c in cardsByNumber], dtype=np.int64)
+        numberArrays = (numbers, codes, np.array(binomials, dtype=np.int64))
+    return numberArrays
+
+def handIndexArray(codes):
+    """ Returns the index of each row of an (N, k) array of card codes """
+    import numpy as np
+    numbers, _, binomialArray = cardNumberArrays()
+    codes = np.asarray(codes, dtype=np.int64)
+    cards = np.sort(numbers[(codes >> 8) & 0xF, (codes >> 12) & 0xF], axis=1)
+    return binomialArray[cards, np.arange(1, codes.shape[1] + 1)].sum(axis=1)
+
+def unrankHandArray(indexes, size):
+    """ Returns an (N, size) array of the card codes of the sets of size cards
+    with the given indexes, in increasing card number order """
+    import numpy as np
+    _, codes, binomialArray = cardNumberArrays()
+    indexes = np.array(indexes, dtype=np.int64)
+    hands = np.empty((len(indexes), size), dtype=np.int64)
+    for k in range(size, 0, -1):
+        # C(n, k) increases with n, so the largest n with C(n, k) <= index is
+        # found by a binary search of column k.
+        n = np.searchsorted(binomialArray[:, k], indexes, side='right') - 1
+        indexes -= binomialArray[n, k]
+        hands[:, k - 1] = codes[n]
+    return hands
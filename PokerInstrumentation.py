@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+import marshal
+import sys
+import Poker
+import BroadPokerTests
+import PokerHandSimulation
+
+# Instrumentation
+#
+# Opt-in call counts and timings for the phases of parsing, evaluating,
+# describing and printing hands. Enabling replaces the functions and methods
+# below with timing wrappers, in Poker and in every module that imported them;
+# disabling puts the originals back. While disabled nothing is wrapped, so
+# there is no cost at all.
+#
+# Each function records its number of calls, its cumulative time (including
+# the instrumented functions it calls) and its own time (excluding them). Own
+# times add up without counting anything twice, so they are what the summary
+# totals per phase.
+
+instrumentedFunctions = (
+        ('parse', Poker, 'parseCards'),
+        ('evaluate', Poker, 'evaluateFive'),
+        ('evaluate', Poker, 'evaluateSix'),
+        ('evaluate', Poker, 'evaluateSeven'),
+        ('evaluate', Poker, 'evaluateCodes'),
+        ('bestHand', Poker, 'chooseCards'),
+        ('construct', Poker.PokerHand, '__init__'),
+        ('construct', Poker.LazyPokerHand, '__init__'),
+        ('category', Poker.PokerHand, 'determineCategory'),
+        ('kicker', Poker.PokerHand, 'determineCategoryRank'),
+        ('kicker', Poker.PokerHand, 'determineKicker'),
+        ('format', Poker.PokerHand, '__str__'),
+        ('format', BroadPokerTests, 'cardListString'),
+        ('deal', Poker.CodeDeck, 'deal'),
+        ('deal', BroadPokerTests, 'createSampleHands'),
+        ('showdown', BroadPokerTests, 'whoIsTheWinner'),
+        ('showdown', BroadPokerTests, 'whatsMyHand'),
+        ('showdown', BroadPokerTests, 'whichCardsShouldIChoose'),
+        ('simulation', PokerHandSimulation, 'generatePokerHands'),
+        ('simulation', PokerHandSimulation, 'runPokerTournaments')
+        )
+
+# (file, line, function name) -> [phase, calls, cumulative seconds, own seconds]
+stats = {}
+# Time spent in instrumented callees, one entry per instrumented call in progress
+calleeTimes = []
+originals = {}
+
+def statKey(function):
+    code = function.__code__
+    return (code.co_filename, code.co_firstlineno, function.__qualname__)
+
+def timed(function, phase):
+    stat = stats.setdefault(statKey(function), [phase, 0, 0.0, 0.0])
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        calleeTimes.append(0.0)
+        started = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - started
+            callees = calleeTimes.pop()
+            stat[1] += 1
+            stat[2] += elapsed
+            stat[3] += elapsed - callees
+            if calleeTimes:
+                calleeTimes[-1] += elapsed
+    return wrapper
+
+def isEnabled():
+    return bool(originals)
+
+def replaceEverywhere(old, new):
+    """ Rebinds module-level names bound to old, e.g. by from Poker import * """
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, '__dict__', None)
+        if namespace is None:
+            continue
+        for name, value in list(namespace.items()):
+            if value is old:
+                namespace[name] = new
+
+def enable():
+    """ Starts recording. Counts and timings add up until reset() """
+    if isEnabled():
+        return
+    for phase, owner, name in instrumentedFunctions:
+        original = owner.__dict__[name]
+        wrapper = timed(original, phase)
+        originals[(owner, name)] = (original, wrapper)
+        setattr(owner, name, wrapper)
+        if not isinstance(owner, type):
+            replaceEverywhere(original, wrapper)
+
+def disable():
+    """ Stops recording and restores the original functions """
+    for (owner, name), (original, wrapper) in originals.items():
+        setattr(owner, name, original)
+        if not isinstance(owner, type):
+            replaceEverywhere(wrapper, original)
+    originals.clear()
+
+def reset():
+    for stat in stats.values():
+        stat[1:] = [0, 0.0, 0.0]
+
+@contextmanager
+def instrumented():
+    """ Records counts and timings for the duration of a with block:
+
+    with instrumented():
+        runPokerTournaments(100)
+    print(summary()) """
+    wasEnabled = isEnabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not wasEnabled:
+            disable()
+
+def phaseTotals():
+    """ Returns {phase : (calls, own seconds)} """
+    totals = {}
+    for phase, calls, _, own in stats.values():
+        phaseCalls, phaseSeconds = totals.get(phase, (0, 0.0))
+        totals[phase] = (phaseCalls + calls, phaseSeconds + own)
+    return totals
+
+def summary():
+    """ Returns a table of the time spent per phase and per function """
+    lines = [f'{"phase":<12} {"calls":>10} {"own s":>10}']
+    totals = sorted(phaseTotals().items(), key=lambda t: -t[1][1])
+    for phase, (calls, seconds) in totals:
+        lines.append(f'{phase:<12} {calls:>10} {seconds:>10.4f}')
+    lines.append('')
+    lines.append(f'{"function":<40} {"calls":>10} {"own s":>10} {"cum s":>10}')
+    for (_, _, name), (_, calls, cumulative, own) in sorted(stats.items(),
+            key=lambda s: -s[1][3]):
+        if calls:
+            lines.append(f'{name:<40} {calls:>10} {own:>10.4f} {cumulative:>10.4f}')
+    return str.join('\n', lines)
+
+def dumpStats(path):
+    """ Writes the recorded timings in the format of cProfile's dump_stats, to
+    be read with pstats.Stats(path) or other profile viewers """
+    profile = { key : (calls, calls, own, cumulative, {}) for key,
+            (_, calls, cumulative, own) in stats.items() if calls }
+    with open(path, 'wb') as f:
+        marshal.dump(profile, f)
@@ -0,0 +1,226 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain, combinations, permutations
+from array import array
+import os
+import struct
+from Poker import *
+
+# Starting hand classes
+#
+# The 1326 hold'em starting hands fall into 169 classes: 13 pairs, 78 suited
+# and 78 offsuit hands. Class i * 13 + j, for rank indexes i and j counted down
+# from the ace, is the pair if i == j, suited if i < j and offsuit if i > j.
+
+STARTING_HAND_CLASSES = 169
+classRankLetters = 'AKQJT98765432'
+descendingRanks = RANKS[::-1]
+
+def startingHandClass(cards):
+    """ Returns the class index of 2 hole cards, given as Cards or strings """
+    first, second = [c if isinstance(c, Card) else Card(c) for c in cards]
+    i = descendingRanks.index(first.rank)
+    j = descendingRanks.index(second.rank)
+    high, low = min(i, j), max(i, j)
+    if first.suit == second.suit and high != low:
+        return high * 13 + low
+    return low * 13 + high
+
+def startingHandClassName(index):
+    """ Returns the name of a class index, e.g. 'AA', 'AKs' or 'T9o' """
+    i, j = divmod(index, 13)
+    name = classRankLetters[min(i, j)] + classRankLetters[max(i, j)]
+    if i == j:
+        return name
+    return name + ('s' if i < j else 'o')
+
+def parseStartingHandClass(name):
+    """ Returns the class index of a name like 'AA', 'AKs', 'T9o' or '109o' """
+    name = name.upper().replace('10', 'T')
+    if len(name) not in (2, 3) or any(c not in classRankLetters for c in name[:2]):
+        raise ValueError(f'{name} is not a starting hand class')
+    i = classRankLetters.index(name[0])
+    j = classRankLetters.index(name[1])
+    high, low = min(i, j), max(i, j)
+    if i == j and len(name) == 2:
+        return i * 13 + i
+    if i != j and name[2:] == 'S':
+        return high * 13 + low
+    if i != j and name[2:] == 'O':
+        return low * 13 + high
+    raise ValueError(f'{name} is not a starting hand class')
+
+def startingHandCombos(index):
+    """ Returns the hole cards (as pairs of Cards) of a class index """
+    i, j = divmod(index, 13)
+    high = descendingRanks[min(i, j)]
+    low = descendingRanks[max(i, j)]
+    if i == j:
+        return [(Card(high, s), Card(high, t)) for s, t in combinations(SUITS, 2)]
+    if i < j:
+        return [(Card(high, s), Card(low, s)) for s in SUITS]
+    return [(Card(high, s), Card(low, t)) for s in SUITS for t in SUITS if s != t]
+
+# Heads-up preflop equity
+#
+# Matchups that only differ by a permutation of the suits have the same
+# equity, so each matchup of two classes is reduced to its distinct suit
+# patterns and each pattern is enumerated over every 5-card board with numpy.
+
+boardIndexes = None
+
+def canonicalMatchup(first, second):
+    """ The smallest relabeling of the suits of two hole card pairs """
+    return min(tuple(tuple(sorted((rankIndexes[c.rank], order[suitIndexes[c.suit]])
+        for c in hand)) for hand in (first, second))
+        for order in permutations(range(4)))
+
+def headsUpEquity(first, second):
+    """ Returns the exact equity of the first of two hole card pairs against the
+    second over all boards, counting ties as half """
+    import numpy as np
+    from PokerBatch import evaluateBatch
+    global boardIndexes
+    if boardIndexes is None:
+        boardIndexes = np.fromiter(chain.from_iterable(combinations(range(48), 5)),
+                dtype=np.uint8).reshape(-1, 5)
+
+    holes = [np.array([c.code for c in hand], dtype=np.int64) for hand in (first, second)]
+    used = set(int(c) for c in chain(*holes))
+    deck = np.array([c.code for c in standardSortedDeck if c.code not in used],
+            dtype=np.int64)
+
+    equity = 0.0
+    chunk = 1 << 18
+    for start in range(0, len(boardIndexes), chunk):
+        boards = deck[boardIndexes[start:start + chunk]]
+        strengths = [evaluateBatch(np.hstack((np.broadcast_to(h, (len(boards), 2)),
+            boards)))[0] for h in holes]
+        equity += np.count_nonzero(strengths[0] > strengths[1])
+        equity += np.count_nonzero(strengths[0] == strengths[1]) / 2
+    return float(equity / len(boardIndexes))
+
+def classEquity(first, second):
+    """ Returns (first, second, equity) of class first against class second,
+    weighting every non-overlapping pair of combos equally """
+    matchups = {}
+    for a in startingHandCombos(first):
+        for b in startingHandCombos(second):
+            if not any(c is d for c in a for d in b):
+                key = canonicalMatchup(a, b)
+                if key in matchups:
+                    matchups[key][2] += 1
+                else:
+                    matchups[key] = [a, b, 1]
+    total = sum(w for _, _, w in matchups.values())
+    equity = sum(headsUpEquity(a, b) * w for a, b, w in matchups.values()) / total
+    return first, second, equity
+
+# Preflop equity matrix file
+#
+# 169 x 169 float32 equities of the row class against the column class,
+# preceded by one byte per entry telling whether it has been computed. The
+# generator saves the file as it goes and skips computed entries, so an
+# interrupted build resumes where it stopped.
+
+PREFLOP_FILE_MAGIC = b'PKPF'
+PREFLOP_FILE_VERSION = 1
+PREFLOP_FILE_HEADER = struct.Struct('<4sI')
+defaultPreflopPath = os.environ.get('POKER_PREFLOP', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'PreflopEquity.bin'))
+
+class PreflopMatrix(object):
+    """ Equities of every starting hand class against every other """
+    def __init__(self, computed=None, equities=None):
+        size = STARTING_HAND_CLASSES ** 2
+        self.computed = computed or bytearray(size)
+        self.equities = equities or array('f', bytes(4 * size))
+        for i in range(STARTING_HAND_CLASSES):
+            self.set(i, i, 0.5)
+
+    def set(self, first, second, equity):
+        self.equities[first * STARTING_HAND_CLASSES + second] = equity
+        self.equities[second * STARTING_HAND_CLASSES + first] = 1 - equity
+        self.computed[first * STARTING_HAND_CLASSES + second] = 1
+        self.computed[second * STARTING_HAND_CLASSES + first] = 1
+
+    def isComputed(self, first, second):
+        return bool(self.computed[first * STARTING_HAND_CLASSES + second])
+
+    def equity(self, first, second):
+        """ Equity of class first against class second. Raises a LookupError
+        if the matchup has not been computed. """
+        if not self.computed[first * STARTING_HAND_CLASSES + second]:
+            raise LookupError(f'{startingHandClassName(first)} vs '
+                    f'{startingHandClassName(second)} has not been computed')
+        return self.equities[first * STARTING_HAND_CLASSES + second]
+
+    def save(self, path=None):
+        path = path or defaultPreflopPath
+        tempPath = f'{path}.{os.getpid()}.tmp'
+        with open(tempPath, 'wb') as f:
+            f.write(PREFLOP_FILE_HEADER.pack(PREFLOP_FILE_MAGIC, PREFLOP_FILE_VERSION))
+            f.write(self.computed)
+            f.write(self.equities.tobytes())
+        os.replace(tempPath, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """ Reads a matrix file. Returns an empty matrix if there is no valid
+        file at path. """
+        size = STARTING_HAND_CLASSES ** 2
+        try:
+            with open(path or defaultPreflopPath, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return cls()
+        if (len(data) != PREFLOP_FILE_HEADER.size + 5 * size or
+                PREFLOP_FILE_HEADER.unpack_from(data) !=
+                (PREFLOP_FILE_MAGIC, PREFLOP_FILE_VERSION)):
+            return cls()
+        start = PREFLOP_FILE_HEADER.size
+        equities = array('f')
+        equities.frombytes(data[start + size:])
+        return cls(bytearray(data[start:start + size]), equities)
+
+def buildPreflopMatrix(path=None, classes=None, workers=None, saveEvery=16):
+    """ Computes the exact equity of every pair of starting hand classes (or
+    of the given class names only) across a pool of worker processes, saving
+    the matrix file every saveEvery matchups. Matchups already in the file are
+    skipped, so calling it again after an interruption resumes the build. """
+    matrix = PreflopMatrix.load(path)
+    indexes = (sorted(parseStartingHandClass(c) for c in classes) if classes
+            else range(STARTING_HAND_CLASSES))
+    todo = [(i, j) for i, j in combinations(indexes, 2) if not matrix.isComputed(i, j)]
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        results = (classEquity(i, j) for i, j in todo)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = [executor.submit(classEquity, i, j) for i, j in todo]
+        results = (f.result() for f in as_completed(futures))
+    try:
+        for done, (i, j, equity) in enumerate(results, 1):
+            matrix.set(i, j, equity)
+            if done % saveEvery == 0:
+                matrix.save(path)
+    finally:
+        matrix.save(path)
+        if workers != 1:
+            # Drop the matchups not started yet (cancel_futures needs Python 3.9)
+            for f in futures:
+                f.cancel()
+            executor.shutdown()
+    return matrix
+
+preflopMatrix = None
+
+def preflopEquity(hand, otherHand):
+    """ Looks up the equity of one starting hand against another in the saved
+    matrix. Hands are class names ('AKs') or hole cards (['AH', 'KH']). """
+    global preflopMatrix
+    if preflopMatrix is None:
+        preflopMatrix = PreflopMatrix.load()
+    classes = [parseStartingHandClass(h) if isinstance(h, str) else
+            startingHandClass(h) for h in (hand, otherHand)]
+    return preflopMatrix.equity(*classes)
@@ -0,0 +1,182 @@
+from itertools import combinations
+from time import perf_counter
+import random
+import re
+from Poker import *
+from PokerEquity import EquityResult, remainingDeck
+from PokerPreflop import classRankLetters, startingHandCombos
+
+# Ranges
+#
+# A range is written as comma or space separated tokens, each optionally
+# followed by a weight (Ex: 'AKs:0.5'):
+#
+#   TT, AKs, AKo, AK       a pair, suited, offsuit, or both
+#   TT+, ATs+, ATo+, AT+   a pair and every higher pair; a high card with the
+#                          given kicker and every higher kicker
+#   22-55, A2s-A5s         every pair or kicker between the two, inclusive
+#   AhKh, 10h9h            a single combo
+#
+# Ranges expand to weighted combos: (Card, Card, weight) tuples.
+
+comboPattern = re.compile(r'^(10|[2-9TJQKA])([HCDS])(10|[2-9TJQKA])([HCDS])$')
+classPattern = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([SO]?)(\+?)$')
+
+def rankLetterIndex(letter):
+    return classRankLetters.index(letter)
+
+def classIndexes(high, low, suitedness):
+    """ Class indexes for rank letter indexes high and low, and '', 'S' or 'O' """
+    if high == low:
+        return [high * 13 + high]
+    high, low = min(high, low), max(high, low)
+    indexes = []
+    if suitedness in ('', 'S'):
+        indexes.append(high * 13 + low)
+    if suitedness in ('', 'O'):
+        indexes.append(low * 13 + high)
+    return indexes
+
+def parseRangeToken(token):
+    """ Returns the combos (pairs of Cards) of a single range token """
+    match = comboPattern.match(token)
+    if match:
+        first = Card(match.group(1).replace('T', '10') + match.group(2))
+        second = Card(match.group(3).replace('T', '10') + match.group(4))
+        if first is second:
+            raise ValueError(f'{token} uses the same card twice')
+        return [(first, second)]
+
+    if '-' in token:
+        start, end = [classPattern.match(t) for t in token.split('-', 1)]
+        if (start is None or end is None or start.group(4) or end.group(4) or
+                start.group(3) != end.group(3)):
+            raise ValueError(f'{token} is not a valid range')
+        startHigh, startLow = map(rankLetterIndex, start.group(1, 2))
+        endHigh, endLow = map(rankLetterIndex, end.group(1, 2))
+        if startHigh == startLow and endHigh == endLow:
+            pairs = range(min(startHigh, endHigh), max(startHigh, endHigh) + 1)
+            classes = [i * 13 + i for i in pairs]
+        elif startHigh == endHigh and startLow != startHigh and endLow != endHigh:
+            kickers = range(min(startLow, endLow), max(startLow, endLow) + 1)
+            classes = [c for k in kickers for c in
+                    classIndexes(startHigh, k, start.group(3))]
+        else:
+            raise ValueError(f'{token} is not a valid range')
+        return [combo for c in classes for combo in startingHandCombos(c)]
+
+    match = classPattern.match(token)
+    if match is None:
+        raise ValueError(f'{token} is not a valid range')
+    high, low = map(rankLetterIndex, match.group(1, 2))
+    suitedness, plus = match.group(3, 4)
+    if high == low and suitedness:
+        raise ValueError(f'{token} is not a valid range')
+    if not plus:
+        classes = classIndexes(high, low, suitedness)
+    elif high == low:
+        classes = [i * 13 + i for i in range(0, high + 1)]
+    else:
+        high, low = min(high, low), max(high, low)
+        classes = [c for k in range(high + 1, low + 1) for c in
+                classIndexes(high, k, suitedness)]
+    return [combo for c in classes for combo in startingHandCombos(c)]
+
+def parseRange(text, deadCards=None):
+    """ Expands a range string (Ex: 'TT+, AKs, KQo') to a list of (Card, Card,
+    weight) combos, leaving out combos that hold a dead card. A combo listed
+    more than once keeps its last weight. """
+    dead = set(cardCodes(deadCards))
+    combos = {}
+    for token in re.split(r'[\s,]+', text.strip().upper()):
+        if not token:
+            continue
+        token, _, weight = token.partition(':')
+        weight = float(weight) if weight else 1.0
+        for first, second in parseRangeToken(token.replace('10', 'T')
+                if not comboPattern.match(token) else token):
+            if first.code not in dead and second.code not in dead:
+                combos[frozenset((first.code, second.code))] = (first, second, weight)
+    return [c for c in combos.values() if c[2] > 0]
+
+def rangeEquity(firstRange, secondRange, board=None, deadCards=None,
+        maxRunouts=20000, seed=None):
+    """ Computes the equity of one range against another on a board. Ranges
+    are range strings or lists of (Card, Card, weight) combos. Every pair of
+    non-overlapping combos counts with the product of their weights.
+
+    Every runout of the board is enumerated, unless there are more than
+    maxRunouts (e.g. preflop), in which case that many are sampled. Each
+    runout is evaluated once for all combos of both ranges. Requires numpy.
+    Returns an EquityResult for each range, whose counts are weights. """
+    import numpy as np
+    from PokerBatch import evaluateBatch
+
+    started = perf_counter()
+    board = cardCodes(board)
+    dead = cardCodes(deadCards)
+    unavailable = set(board + dead)
+    ranges = [parseRange(r) if isinstance(r, str) else r for r in (firstRange, secondRange)]
+    ranges = [[c for c in r if c[0].code not in unavailable and
+        c[1].code not in unavailable] for r in ranges]
+    if not ranges[0] or not ranges[1]:
+        raise ValueError('Both ranges need at least one combo that is not dead.')
+
+    deck = remainingDeck(board, dead)
+    missing = 5 - len(board)
+    runoutCount = 1
+    for i in range(missing):
+        runoutCount = runoutCount * (len(deck) - i) // (i + 1)
+    if runoutCount <= maxRunouts:
+        runouts = np.array(list(combinations(deck, missing)), dtype=np.int64)
+        exhaustive = True
+    else:
+        rng = random.Random(seed)
+        runouts = np.array([rng.sample(deck, missing) for _ in range(maxRunouts)],
+                dtype=np.int64)
+        exhaustive = False
+    runouts = runouts.reshape(len(runouts), missing)
+    boardCodes = np.array(board, dtype=np.int64)
+    placeholderHand = np.array([c.code for c in standardSortedDeck[:7]], dtype=np.int64)
+
+    holes = [np.array([[a.code, b.code] for a, b, _ in r], dtype=np.int64)
+            for r in ranges]
+    weights = [np.array([w for _, _, w in r]) for r in ranges]
+    # Weight of every pair of combos that share no card
+    overlap = (holes[0][:, :, None, None] == holes[1][None, None, :, :]).any(axis=(1, 3))
+    pairWeights = (np.outer(weights[0], weights[1]) * ~overlap)[:, :, None]
+
+    wins = ties = losses = 0.0
+    chunk = max(1, 2000000 // pairWeights.size)
+    for start in range(0, len(runouts), chunk):
+        chunkRunouts = runouts[start:start + chunk]
+        boards = np.hstack((np.broadcast_to(boardCodes, (len(chunkRunouts),
+            len(board))), chunkRunouts))
+        # Strength of each combo on each runout of the chunk, and whether the
+        # runout leaves the combo live
+        strengths = []
+        live = []
+        for h in holes:
+            hands = np.concatenate((np.repeat(h[:, None, :], len(boards), axis=1),
+                np.broadcast_to(boards, (len(h),) + boards.shape)), axis=2)
+            isLive = ~(h[:, :, None, None] == chunkRunouts[None, None, :, :]).any(axis=(1, 3))
+            # Runouts holding a card of the combo are not real hands, they are
+            # evaluated as any valid hand and left out by the live mask.
+            hands[~isLive] = placeholderHand
+            strengths.append(evaluateBatch(hands.reshape(-1, 7))[0].reshape(len(h), -1))
+            live.append(isLive)
+
+        w = pairWeights * live[0][:, None, :] * live[1][None, :, :]
+        first = strengths[0][:, None, :]
+        second = strengths[1][None, :, :]
+        wins += (w * (first > second)).sum()
+        ties += (w * (first == second)).sum()
+        losses += (w * (first < second)).sum()
+
+    seconds = perf_counter() - started
+    results = [EquityResult(wins, ties, losses, wins + ties / 2, wins + ties / 4, seconds),
+            EquityResult(losses, ties, wins, losses + ties / 2, losses + ties / 4, seconds)]
+    if exhaustive:
+        for result in results:
+            result.standardError = 0.0
+    return results
@@ -0,0 +1,188 @@
+from collections import Counter
+from itertools import combinations, islice
+from time import perf_counter
+import argparse
+import random
+import sys
+from Poker import *
+
+# Reference evaluator
+#
+# A deliberately simple evaluator to check the lookup tables against: it
+# scores every 5 cards of a hand from the ranks and suits of the Cards alone,
+# with no tables, bit tricks or shared code with the production evaluator, and
+# keeps the best. A score is the category value followed by the 5 ranks
+# ordered by how often they occur and then by rank, the ace of a wheel last,
+# so scores compare like hands.
+
+WHEEL_RANKS = [12, 3, 2, 1, 0]
+
+def referenceScore(cards):
+    """ Returns the (category value, rank indexes) score of exactly 5 Cards """
+    values = sorted((rankIndexes[c.rank] for c in cards), reverse=True)
+    counts = Counter(values)
+    ranks = tuple(sorted(values, key=lambda r: (counts[r], r), reverse=True))
+    shape = sorted(counts.values(), reverse=True)
+    flush = len(set(c.suit for c in cards)) == 1
+    straight = len(counts) == 5 and values[0] - values[4] == 4
+    if values == WHEEL_RANKS:
+        straight = True
+        ranks = (3, 2, 1, 0, 12)
+
+    if straight and flush:
+        category = (PokerHandCategory.ROYAL_FLUSH if ranks[0] == 12 else
+                PokerHandCategory.STRAIGHT_FLUSH)
+    elif shape == [4, 1]:
+        category = PokerHandCategory.FOUR_OF_A_KIND
+    elif shape == [3, 2]:
+        category = PokerHandCategory.FULL_HOUSE
+    elif flush:
+        category = PokerHandCategory.FLUSH
+    elif straight:
+        category = PokerHandCategory.STRAIGHT
+    elif shape == [3, 1, 1]:
+        category = PokerHandCategory.THREE_OF_A_KIND
+    elif shape == [2, 2, 1]:
+        category = PokerHandCategory.TWO_PAIR
+    elif shape == [2, 1, 1, 1]:
+        category = PokerHandCategory.ONE_PAIR
+    else:
+        category = PokerHandCategory.HIGH_CARD
+    return (category.value, ranks)
+
+def referenceBestHand(cards):
+    """ Returns the score and the Cards of the best 5 of 5 or more Cards """
+    best = max(combinations(cards, 5), key=referenceScore)
+    return referenceScore(best), list(best)
+
+# Differential testing
+#
+# Runs the reference evaluator and PokerHand over the same hands, timing each
+# engine, and records a mismatch when they disagree on the category, when the
+# 5 cards PokerHand picks are not among the hand's cards (compared by code,
+# as Cards compare by rank) or do not score as the reference's best hand, or
+# when hands the reference scores alike get different strengths. Once all
+# hands are checked, sorting the reference scores must sort the strengths too.
+
+class DifferentialReport(object):
+    def __init__(self, name, maxMismatches=20):
+        self.name = name
+        self.hands = 0
+        self.mismatchCount = 0
+        # The first maxMismatches, as (reason, cards, reference, production)
+        self.mismatches = []
+        self.maxMismatches = maxMismatches
+        self.referenceSeconds = 0.0
+        self.productionSeconds = 0.0
+
+    def addMismatch(self, reason, cards, reference, production):
+        self.mismatchCount += 1
+        if len(self.mismatches) < self.maxMismatches:
+            self.mismatches.append((reason, cards, reference, production))
+
+    def speedup(self):
+        """ How many times faster production is than the reference """
+        return (self.referenceSeconds / self.productionSeconds if
+                self.productionSeconds else 0.0)
+
+    def __str__(self):
+        lines = [f'{self.name}: {self.hands} hands, {self.mismatchCount} mismatches']
+        for engine, seconds in (('reference', self.referenceSeconds),
+                ('production', self.productionSeconds)):
+            lines.append(f'  {engine:<10} {seconds:8.2f}s '
+                    f'{self.hands / seconds if seconds else 0:12,.0f} hands/s')
+        lines.append(f'  production is {self.speedup():.1f}x faster')
+        for reason, cards, reference, production in self.mismatches:
+            lines.append(f'  {reason}: {str.join(" ", cards)} reference {reference} '
+                    f'production {production}')
+        return str.join('\n', lines)
+
+def compareHands(hands, report, strengthsByScore):
+    """ Checks a list of hands (lists of Cards) and adds them to the report """
+    start = perf_counter()
+    references = [referenceBestHand(hand) for hand in hands]
+    middle = perf_counter()
+    productions = [PokerHand(list(hand)) for hand in hands]
+    report.referenceSeconds += middle - start
+    report.productionSeconds += perf_counter() - middle
+    report.hands += len(hands)
+
+    for hand, (score, _), production in zip(hands, references, productions):
+        codes = set(c.code for c in hand)
+        described = (production.category.value, production.strength)
+        if production.category.value != score[0]:
+            reason = 'category'
+        elif (len(set(c.code for c in production.cards)) != 5 or not
+                codes.issuperset(c.code for c in production.cards)):
+            reason = 'cards not in hand'
+        elif referenceScore(production.cards) != score:
+            reason = 'not the best cards'
+        elif strengthsByScore.setdefault(score, production.strength) != production.strength:
+            reason = 'strength'
+        else:
+            continue
+        report.addMismatch(reason, [cardStringsByCode[c.code] for c in hand],
+                score, described)
+
+def checkOrder(report, strengthsByScore):
+    """ Adds a mismatch for each pair of consecutive reference scores whose
+    strengths are not in increasing order """
+    scores = sorted(strengthsByScore)
+    for lower, higher in zip(scores, scores[1:]):
+        if strengthsByScore[lower] >= strengthsByScore[higher]:
+            report.addMismatch('order', [], (lower, higher),
+                    (strengthsByScore[lower], strengthsByScore[higher]))
+
+def exhaustiveFiveCardCheck(step=1, chunkSize=10000, strengthsByScore=None):
+    """ Compares the engines on every step-th of the 2,598,960 5-card hands.
+    Returns the DifferentialReport. """
+    report = DifferentialReport('5-card hands' + (f' (every {step})' if step > 1 else ''))
+    strengthsByScore = {} if strengthsByScore is None else strengthsByScore
+    hands = islice(combinations(standardSortedDeck, 5), 0, None, step)
+    while True:
+        chunk = [list(h) for h in islice(hands, chunkSize)]
+        if not chunk:
+            break
+        compareHands(chunk, report, strengthsByScore)
+    checkOrder(report, strengthsByScore)
+    if step == 1 and len(strengthsByScore) != 7462:
+        report.addMismatch('classes', [], 7462, len(strengthsByScore))
+    return report
+
+def randomSevenCardCheck(samples, seed=None, chunkSize=10000, strengthsByScore=None):
+    """ Compares the engines on samples random 7-card hands. Returns the
+    DifferentialReport. """
+    report = DifferentialReport('7-card samples')
+    strengthsByScore = {} if strengthsByScore is None else strengthsByScore
+    rng = random.Random(seed)
+    for start in range(0, samples, chunkSize):
+        chunk = [rng.sample(standardSortedDeck, 7) for _ in
+                range(min(chunkSize, samples - start))]
+        compareHands(chunk, report, strengthsByScore)
+    checkOrder(report, strengthsByScore)
+    return report
+
+def differentialTest(fiveCardStep=1, sevenCardSamples=100000, seed=None):
+    """ Runs both checks, sharing the strengths seen for each reference score.
+    Returns their reports. """
+    strengthsByScore = {}
+    return [exhaustiveFiveCardCheck(fiveCardStep, strengthsByScore=strengthsByScore),
+            randomSevenCardCheck(sevenCardSamples, seed,
+                strengthsByScore=strengthsByScore)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Checks PokerHand against a '
+            'brute-force reference evaluator and compares their speed.')
+    parser.add_argument('--step', type=int, default=1,
+            help='check every step-th 5-card hand')
+    parser.add_argument('--samples', type=int, default=100000,
+            help='number of random 7-card hands')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    reports = differentialTest(args.step, args.samples, args.seed)
+    for report in reports:
+        print(report)
+    return 1 if any(r.mismatchCount for r in reports) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
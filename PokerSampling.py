@@ -0,0 +1,101 @@
+from bisect import bisect_right
+from collections import Counter
+from itertools import combinations
+import random
+import Poker
+from Poker import *
+
+# Category sampling
+#
+# Every 5-card hand belongs to one hand class (see buildHandClasses), and the
+# number of hands in a class only depends on the shape of its ranks:
+#
+#   flush classes          4 (one per suit)
+#   5 distinct ranks       4^5 - 4 suit patterns (all but the flushes)
+#   repeated ranks         C(4, n) suit choices for each rank held n times
+#
+# Numbering the hands of a category class by class, and the hands of a class
+# by suit pattern, gives every hand of the category an index. Unranking a
+# random index draws a hand uniformly from the category, at the same cost for
+# a royal flush as for a high card.
+
+categoryCounts = None
+
+def loadCategoryCounts():
+    """ Returns { category : (strengths, cumulative hand counts) } """
+    global categoryCounts
+    if Poker.handClasses is None:
+        Poker.loadTables()
+    categoryCounts = {}
+    for strength in range(1, len(Poker.handClasses)):
+        category, _, cardRanks = Poker.handClasses[strength]
+        strengths, cumulative = categoryCounts.setdefault(category, ([], []))
+        strengths.append(strength)
+        cumulative.append((cumulative[-1] if cumulative else 0) +
+                classHandCount(category, cardRanks))
+    return categoryCounts
+
+def classHandCount(category, cardRanks):
+    if category in FLUSH_CATEGORIES:
+        return 4
+    counts = Counter(cardRanks).values()
+    if len(counts) == 5:
+        return 4 ** 5 - 4
+    count = 1
+    for n in counts:
+        count *= len(suitCombinations[n])
+    return count
+
+def categoryHandCount(category):
+    """ The number of 5-card hands of a category """
+    if categoryCounts is None:
+        loadCategoryCounts()
+    return categoryCounts[category][1][-1]
+
+# Suit patterns of 5 distinct ranks, as base 4 numbers, skip the 4 flushes:
+# 0, 341, 682 and 1023.
+MONOTONE_PATTERNS = tuple(s * 341 for s in range(4))
+suitCombinations = { n : list(combinations(SUITS, n)) for n in range(1, 5) }
+
+def unrankCategoryHand(category, index):
+    """ Returns the 5 Cards of the hand with the given index (0 to
+    categoryHandCount(category) - 1) among the hands of a category """
+    if categoryCounts is None:
+        loadCategoryCounts()
+    strengths, cumulative = categoryCounts[category]
+    if not 0 <= index < cumulative[-1]:
+        raise IndexError(f'{category.name} has {cumulative[-1]} hands')
+    i = bisect_right(cumulative, index)
+    index -= cumulative[i - 1] if i else 0
+    _, _, cardRanks = Poker.handClasses[strengths[i]]
+
+    if category in FLUSH_CATEGORIES:
+        suit = SUITS[index]
+        return [cardsByRankAndSuit[(RANKS[r], suit)] for r in cardRanks]
+    if len(set(cardRanks)) == 5:
+        for pattern in MONOTONE_PATTERNS:
+            if index >= pattern:
+                index += 1
+        suits = [SUITS[(index >> (2 * j)) & 3] for j in range(5)]
+        return [cardsByRankAndSuit[(RANKS[r], s)] for r, s in zip(cardRanks, suits)]
+    cards = []
+    for r, n in Counter(cardRanks).items():
+        index, choice = divmod(index, len(suitCombinations[n]))
+        cards.extend(cardsByRankAndSuit[(RANKS[r], s)] for s in suitCombinations[n][choice])
+    return cards
+
+def sampleCategoryHands(categories, count=1, rng=None, seed=None):
+    """ Draws count 5-card hands uniformly from the hands of one category or
+    any of a list of categories. Returns a list of lists of Cards. """
+    if isinstance(categories, PokerHandCategory):
+        categories = [categories]
+    rng = rng or random.Random(seed)
+    totals = []
+    for category in categories:
+        totals.append((totals[-1] if totals else 0) + categoryHandCount(category))
+    hands = []
+    for _ in range(count):
+        index = rng.randrange(totals[-1])
+        i = bisect_right(totals, index)
+        hands.append(unrankCategoryHand(categories[i], index - (totals[i - 1] if i else 0)))
+    return hands
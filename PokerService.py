@@ -0,0 +1,212 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from BroadPokerTests import handResults, showdownResult
+
+# Showdown service
+#
+# A local asyncio server speaking JSON lines: each request is one JSON object
+# on a line, and each response is one JSON object on a line carrying the id
+# of its request. Responses to requests sent on the same connection may come
+# back in any order.
+#
+#   {"id": 1, "op": "evaluate", "cards": ["JH", "4C", "4S", "JC", "9H"]}
+#   {"id": 1, "result": {"category": "TWO_PAIR", "strength": ..., "cards": [...]}}
+#
+#   {"id": 2, "op": "showdown", "hands": [["AH", "KH", ...], ["2C", "2D", ...]]}
+#   {"id": 2, "result": {"winners": [0], "hands": [{...}, {...}]}}
+#
+#   {"id": 3, "op": "stats"}
+#
+# A failed request gets {"id": ..., "error": "..."}.
+#
+# Requests arriving within batchDelay of each other (up to maxBatch hands) are
+# evaluated together with one call to handResults in a worker process, so the
+# event loop only parses and routes messages.
+
+class ShowdownService(object):
+    def __init__(self, workers=None, maxBatch=4096, batchDelay=0.002,
+            latencyWindow=10000):
+        # Forked workers would inherit the sockets of open connections and
+        # keep them open after the service closes them.
+        context = (multiprocessing.get_context('forkserver') if 'forkserver' in
+                multiprocessing.get_all_start_methods() else None)
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                mp_context=context)
+        self.maxBatch = maxBatch
+        self.batchDelay = batchDelay
+        # (card arrays, future) of the requests waiting for the next batch
+        self.pending = []
+        self.pendingHands = 0
+        self.flushHandle = None
+        self.started = perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.hands = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=latencyWindow)
+
+    async def evaluate(self, cardArrays):
+        """ Returns the handResults of a list of card arrays, evaluated along
+        with the other requests of its batch """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((cardArrays, future))
+        self.pendingHands += len(cardArrays)
+        if self.pendingHands >= self.maxBatch:
+            self.flush()
+        elif self.flushHandle is None:
+            self.flushHandle = loop.call_later(self.batchDelay, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flushHandle is not None:
+            self.flushHandle.cancel()
+            self.flushHandle = None
+        if self.pending:
+            batch, self.pending, self.pendingHands = self.pending, [], 0
+            asyncio.ensure_future(self.runBatch(batch))
+
+    async def runBatch(self, batch):
+        cardArrays = [cards for request, _ in batch for cards in request]
+        self.batches += 1
+        self.hands += len(cardArrays)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, handResults, cardArrays)
+        except Exception:
+            # One bad hand fails the whole batch; evaluate the requests on
+            # their own so only the bad ones fail.
+            for request, future in batch:
+                try:
+                    future.set_result(await loop.run_in_executor(self.executor,
+                        handResults, request))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        start = 0
+        for request, future in batch:
+            future.set_result(results[start:start + len(request)])
+            start += len(request)
+
+    async def handle(self, request):
+        """ Returns the response to a request object """
+        started = perf_counter()
+        self.requests += 1
+        response = { 'id' : request.get('id') if isinstance(request, dict) else None }
+        try:
+            op = request.get('op')
+            if op == 'evaluate':
+                response['result'] = (await self.evaluate([request['cards']]))[0]
+            elif op == 'showdown':
+                hands = await self.evaluate(request['hands'])
+                response['result'] = { 'winners' : showdownResult(hands), 'hands' : hands }
+            elif op == 'stats':
+                response['result'] = self.stats()
+            else:
+                raise ValueError(f'Unknown op {op!r}')
+        except Exception as e:
+            self.errors += 1
+            response['error'] = f'{type(e).__name__}: {e}'
+        self.latencies.append(perf_counter() - started)
+        return response
+
+    def stats(self):
+        """ Request and hand counts, throughput since the start, and latency
+        percentiles (in milliseconds) over the most recent requests """
+        seconds = perf_counter() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+                'requests' : self.requests,
+                'errors' : self.errors,
+                'hands' : self.hands,
+                'batches' : self.batches,
+                'handsPerBatch' : self.hands / self.batches if self.batches else 0.0,
+                'seconds' : seconds,
+                'requestsPerSecond' : self.requests / seconds,
+                'handsPerSecond' : self.hands / seconds,
+                'latencyMs' : { 'p50' : percentile(0.5), 'p90' : percentile(0.9),
+                    'p99' : percentile(0.99), 'max' : percentile(1.0) }
+                }
+
+    async def serveClient(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.requests += 1
+                self.errors += 1
+                response = { 'id' : None, 'error' : f'Invalid JSON: {e}' }
+            else:
+                response = await self.handle(request)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """ Starts listening. Returns the asyncio server. """
+        return await asyncio.start_server(self.serveClient, host, port)
+
+    def close(self):
+        self.executor.shutdown()
+
+async def serve(host='127.0.0.1', port=8765, **kwargs):
+    service = ShowdownService(**kwargs)
+    server = await service.start(host, port)
+    print(f'Serving on {", ".join(str(s.getsockname()) for s in server.sockets)}',
+            file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serves poker hand evaluations '
+            'and showdowns as JSON lines over TCP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None,
+            help='worker processes (default: one per core)')
+    parser.add_argument('--max-batch', type=int, default=4096,
+            help='most hands evaluated in one batch')
+    parser.add_argument('--batch-delay', type=float, default=0.002,
+            help='seconds to wait for more requests before evaluating a batch')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers,
+            maxBatch=args.max_batch, batchDelay=args.batch_delay))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
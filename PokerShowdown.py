@@ -0,0 +1,100 @@
+from Poker import *
+
+# Showdown settlement
+#
+# A table is a dict of its players in seat order and an optional board:
+#
+#   { 'board' : ['2H', '7H', 'QC', '3D', '4S'],
+#     'players' : [ { 'id' : 'ann', 'cards' : ['AH', 'KH'], 'stack' : 0,
+#                     'contribution' : 100 },
+#                   { 'id' : 'bob', 'cards' : ['QS', 'QD'], 'stack' : 900,
+#                     'contribution' : 300 },
+#                   { 'id' : 'cat', 'contribution' : 50, 'folded' : True }, ... ] }
+#
+# where contribution is what the player put in the pot and stack what they
+# have left. Ids default to the seat number.
+#
+# The pot is split into a main pot and side pots at each contribution level
+# of the players still in: a pot holds what every player put in up to its
+# level, above the level below it, and only players who put in at least its
+# level can win it. Folded players' chips go to the pots but they cannot win.
+#
+# Each player's hand is evaluated once, and the players are sorted by
+# strength once, so the winners of every pot are the first eligible players
+# in that order. A split pot is shared equally, and the odd chips go one each
+# to the winners in seat order.
+
+def potLevels(contributions, live):
+    """ Returns [(amount, level)] of the pots, from the main pot up """
+    levels = sorted(set(contributions[i] for i in live))
+    pots = []
+    below = 0
+    for j, level in enumerate(levels):
+        # The last pot also takes folded chips above the highest live level.
+        top = level if j < len(levels) - 1 else max(contributions)
+        amount = sum(min(c, top) - min(c, below) for c in contributions)
+        # Players who put nothing in (Ex: everyone checked) make no pot
+        if amount:
+            pots.append((amount, level))
+        below = top
+    return pots
+
+def resolveShowdown(table):
+    """ Settles one table. Returns a dict of the pots (amount, eligible and
+    winning players, and what each winner gets), the players with the best
+    hand, the payout and final stack of every player, and the strength and
+    category of each shown hand. """
+    players = table['players']
+    ids = [p.get('id', i) for i, p in enumerate(players)]
+    contributions = [p.get('contribution', 0) for p in players]
+    live = [i for i, p in enumerate(players) if not p.get('folded')]
+    if not live:
+        raise ValueError('At least one player must not have folded.')
+
+    strengths = {}
+    if len(live) > 1:
+        board = cardCodes(table.get('board'))
+        for i in live:
+            strengths[i] = evaluateCodes(cardCodes(players[i]['cards']) + board)
+    # Strongest first, ties in seat order
+    ranking = sorted(live, key=lambda i: -strengths.get(i, 0))
+
+    best = strengths.get(ranking[0], 0)
+    bestHands = sorted(i for i in ranking if strengths.get(i, 0) == best)
+
+    payouts = [0] * len(players)
+    pots = []
+    for amount, level in potLevels(contributions, live):
+        winners = []
+        for i in ranking:
+            if contributions[i] < level:
+                continue
+            if winners and strengths.get(i, 0) != strengths.get(winners[0], 0):
+                break
+            winners.append(i)
+        winners.sort()
+        share, oddChips = divmod(amount, len(winners))
+        shares = {}
+        for j, i in enumerate(winners):
+            shares[ids[i]] = share + (1 if j < oddChips else 0)
+            payouts[i] += shares[ids[i]]
+        pots.append({
+            'amount' : amount,
+            'eligible' : [ids[i] for i in live if contributions[i] >= level],
+            'winners' : [ids[i] for i in winners],
+            'shares' : shares
+            })
+
+    return {
+            'pots' : pots,
+            'winners' : [ids[i] for i in bestHands],
+            'payouts' : { ids[i] : payouts[i] for i in range(len(players)) },
+            'stacks' : { ids[i] : p.get('stack', 0) + payouts[i] for i, p in
+                enumerate(players) },
+            'hands' : { ids[i] : { 'strength' : s, 'category' : strengthCategory(s).name }
+                for i, s in strengths.items() }
+            }
+
+def resolveShowdowns(tables):
+    """ Settles a list of tables, see resolveShowdown """
+    return [resolveShowdown(table) for table in tables]
@@ -0,0 +1,213 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import os
+import random
+from Poker import *
+
+# Tournament simulation
+#
+# Plays rounds of players hands of cardsToDraw cards, each round from a fresh
+# shuffled deck, and counts the outcomes instead of printing them. Rounds are
+# split into shards of shardRounds, played in worker processes, each shard
+# with its own random generator seeded by (seed, shard number), so a seed
+# gives the same totals whatever the number of workers. Within a shard,
+# rounds are dealt and evaluated with numpy in batches of batchRounds.
+#
+# With a checkpoint path, the totals and the list of finished shards are
+# saved as shards finish, and a run started again with the same settings
+# only plays the shards that are missing. With a hand log path, each shard
+# also writes every hand it deals to its own text file, handLogPath.<shard>.
+
+CATEGORY_SLOTS = len(PokerHandCategory) + 1
+
+class TournamentStats(object):
+    """ Counts of the outcomes of simulated rounds """
+    def __init__(self, players, rounds=0, ties=0, handsByCategory=None,
+            winsByCategory=None, seatWins=None, seatTies=None, seatShares=None):
+        self.players = players
+        self.rounds = rounds
+        # Rounds won by more than one player
+        self.ties = ties
+        # Hands dealt and rounds won, by PokerHandCategory value
+        self.handsByCategory = handsByCategory or [0] * CATEGORY_SLOTS
+        self.winsByCategory = winsByCategory or [0] * CATEGORY_SLOTS
+        # Rounds each seat won alone, rounds it shared, and its share of the
+        # rounds, counting a round shared by N players as 1/N
+        self.seatWins = seatWins or [0] * players
+        self.seatTies = seatTies or [0] * players
+        self.seatShares = seatShares or [0.0] * players
+
+    def add(self, other):
+        self.rounds += other.rounds
+        self.ties += other.ties
+        for mine, theirs in ((self.handsByCategory, other.handsByCategory),
+                (self.winsByCategory, other.winsByCategory),
+                (self.seatWins, other.seatWins), (self.seatTies, other.seatTies),
+                (self.seatShares, other.seatShares)):
+            for i, count in enumerate(theirs):
+                mine[i] += count
+        return self
+
+    def tieRate(self):
+        return self.ties / self.rounds if self.rounds else 0.0
+
+    def seatWinRates(self):
+        """ Share of the rounds won by each seat """
+        return [s / self.rounds if self.rounds else 0.0 for s in self.seatShares]
+
+    def toDict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def fromDict(cls, values):
+        return cls(**values)
+
+    def __str__(self):
+        lines = [f'{self.rounds} rounds, {self.players} players, '
+                f'tie rate {self.tieRate():.4f}', '',
+                f'{"category":<16} {"dealt":>8} {"won":>8}']
+        hands = self.rounds * self.players
+        for category in PokerHandCategory:
+            v = category.value
+            lines.append(f'{category.name:<16} '
+                    f'{self.handsByCategory[v] / hands if hands else 0:>8.4%} '
+                    f'{self.winsByCategory[v] / self.rounds if self.rounds else 0:>8.4%}')
+        lines.append('')
+        lines.append(str.join('  ', [f'seat {i + 1}: {rate:.4f}' for i, rate in
+            enumerate(self.seatWinRates())]))
+        return str.join('\n', lines)
+
+def playShard(shard, rounds, players, cardsToDraw, seed, batchRounds=65536,
+        handLogPath=None):
+    """ Plays the rounds of one shard. Returns its TournamentStats. """
+    import numpy as np
+    from PokerBatch import evaluateBatch
+    rng = np.random.default_rng([seed, shard])
+    deck = np.array([c.code for c in standardSortedDeck], dtype=np.int64)
+    stats = TournamentStats(players)
+    log = open(f'{handLogPath}.{shard}', 'w') if handLogPath else None
+    try:
+        for start in range(0, rounds, batchRounds):
+            count = min(batchRounds, rounds - start)
+            dealt = rng.permuted(np.broadcast_to(deck, (count, len(deck))),
+                    axis=1)[:, :players * cardsToDraw]
+            hands = dealt.reshape(count * players, cardsToDraw)
+            strengths, categories = evaluateBatch(hands)
+            strengths = strengths.reshape(count, players)
+            categories = categories.reshape(count, players)
+
+            best = strengths.max(axis=1)
+            winners = strengths == best[:, None]
+            winnerCounts = winners.sum(axis=1)
+            tied = winnerCounts > 1
+            stats.add(TournamentStats(players, count, int(tied.sum()),
+                handsByCategory=np.bincount(categories.ravel(),
+                    minlength=CATEGORY_SLOTS).tolist(),
+                winsByCategory=np.bincount(categories[np.arange(count),
+                    strengths.argmax(axis=1)], minlength=CATEGORY_SLOTS).tolist(),
+                seatWins=(winners & ~tied[:, None]).sum(axis=0).tolist(),
+                seatTies=(winners & tied[:, None]).sum(axis=0).tolist(),
+                seatShares=(winners / winnerCounts[:, None]).sum(axis=0).tolist()))
+
+            if log:
+                # round, seat, cards, category, and a star for the winners
+                for i, hand in enumerate(hands.tolist()):
+                    r, p = divmod(i, players)
+                    cards = str.join(' ', [cardStringsByCode[c] for c in hand])
+                    category = PokerHandCategory(int(categories[r, p])).name
+                    log.write(f'{start + r} {p + 1} {cards} {category}'
+                            f'{" *" if winners[r, p] else ""}\n')
+    finally:
+        if log:
+            log.close()
+    return shard, stats
+
+def readCheckpoint(path, settings):
+    """ Returns the finished shards and totals saved at path, or an empty set
+    and None if there is no checkpoint. A seed of None in settings matches any
+    seed, and is set to the seed of the checkpoint. """
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return set(), None
+    if settings['seed'] is None:
+        settings['seed'] = checkpoint['settings'].get('seed')
+    if checkpoint['settings'] != settings:
+        raise ValueError(f'{path} is a checkpoint of a different simulation: '
+                f'{checkpoint["settings"]}')
+    return set(checkpoint['shards']), TournamentStats.fromDict(checkpoint['stats'])
+
+def writeCheckpoint(path, settings, shards, stats):
+    tempPath = f'{path}.{os.getpid()}.tmp'
+    with open(tempPath, 'w') as f:
+        json.dump({ 'settings' : settings, 'shards' : sorted(shards),
+            'stats' : stats.toDict() }, f)
+    os.replace(tempPath, path)
+
+def simulateTournaments(rounds, players=5, cardsToDraw=7, seed=None,
+        shardRounds=1000000, workers=None, checkpointPath=None, handLogPath=None,
+        checkpointEvery=1):
+    """ Plays rounds of players hands of 5 to 7 cards across worker processes
+    (in-process if workers is 1). Returns the TournamentStats of all rounds.
+    Requires numpy. """
+    if not 5 <= cardsToDraw <= 7 or players * cardsToDraw > 52:
+        raise ValueError('Each player needs 5 to 7 cards from one deck.')
+    settings = { 'rounds' : rounds, 'players' : players, 'cardsToDraw' : cardsToDraw,
+            'seed' : seed, 'shardRounds' : shardRounds }
+    # Without a seed, resuming from a checkpoint continues with its seed.
+    done, stats = (readCheckpoint(checkpointPath, settings) if checkpointPath
+            else (set(), None))
+    if settings['seed'] is None:
+        settings['seed'] = random.randrange(2**63)
+    seed = settings['seed']
+    stats = stats or TournamentStats(players)
+    todo = [(shard, min(shardRounds, rounds - start)) for shard, start in
+            enumerate(range(0, rounds, shardRounds)) if shard not in done]
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        results = (playShard(shard, count, players, cardsToDraw, seed,
+            handLogPath=handLogPath) for shard, count in todo)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = [executor.submit(playShard, shard, count, players, cardsToDraw,
+            seed, handLogPath=handLogPath) for shard, count in todo]
+        results = (f.result() for f in as_completed(futures))
+    try:
+        for finished, (shard, shardStats) in enumerate(results, 1):
+            stats.add(shardStats)
+            done.add(shard)
+            if checkpointPath and finished % checkpointEvery == 0:
+                writeCheckpoint(checkpointPath, settings, done, stats)
+    finally:
+        if checkpointPath:
+            writeCheckpoint(checkpointPath, settings, done, stats)
+        if workers != 1:
+            # Drop the shards not started yet (cancel_futures needs Python 3.9)
+            for f in futures:
+                f.cancel()
+            executor.shutdown()
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulates poker rounds and '
+            'reports category frequencies, tie rates and win rates per seat.')
+    parser.add_argument('rounds', type=int)
+    parser.add_argument('--players', type=int, default=5)
+    parser.add_argument('--cards', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--shard-rounds', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=None,
+            help='file to save progress to and resume from')
+    parser.add_argument('--hand-log', default=None,
+            help='write every hand to text files with this prefix')
+    args = parser.parse_args(argv)
+    stats = simulateTournaments(args.rounds, args.players, args.cards, args.seed,
+            args.shard_rounds, args.workers, args.checkpoint, args.hand_log)
+    print(stats)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
 import unittest
+import os
+import sys
+import tempfile
 from Poker import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 ##TODO Test Rank Comparison, esp face ranks
 ##TODO Test Card Comparison esp face cards
 ##TODO Test Card Construction from strings
@@ -34,6 +42,490 @@ class TestPokerMethods(unittest.TestCase):
 
         self.assertEqual(actual, expected)
 
+    def test_TwoPair_Construct_DerivesCategoryRankAndKicker(self):
+        hand = getPokerHand(['JH', '4C', '4S', 'JC', '9H'])
+
+        self.assertEqual(hand.category, PokerHandCategory.TWO_PAIR)
+        self.assertEqual(hand.categoryRank, Rank.JACK)
+        self.assertEqual(hand.kicker, [Rank.FOUR, Rank.NINE])
+
+    def test_Wheel_Construct_IsFiveHighStraight(self):
+        wheel = getPokerHand(['AH', '2C', '3S', '4C', '5D'])
+        sixHigh = getPokerHand(['6H', '2C', '3S', '4C', '5D'])
+
+        self.assertEqual(wheel.category, PokerHandCategory.STRAIGHT)
+        self.assertEqual(wheel.categoryRank, Rank.FIVE)
+        self.assertLess(wheel.strength, sixHigh.strength)
+
+    def test_SevenCards_Construct_ChoosesBestFive(self):
+        hand = getPokerHand(['3H', '7S', '3S', 'QD', 'AH', '3D', '4S'])
+
+        actual = [str(c.rank.value) + c.suit.value for c in hand.cards]
+        expected = ['3H', '3S', '3D', 'AH', 'QD']
+
+        self.assertEqual(hand.category, PokerHandCategory.THREE_OF_A_KIND)
+        self.assertEqual(sorted(actual), sorted(expected))
+
+    def test_SevenCardsWithWheel_Construct_ChoosesStraight(self):
+        hand = getPokerHand(['AH', '2C', '3S', '4C', '5D', 'KH', 'KS'])
+
+        self.assertEqual(hand.category, PokerHandCategory.STRAIGHT)
+        self.assertEqual(hand.categoryRank, Rank.FIVE)
+
+    def test_TableFile_WriteAndRead_MatchesBuiltTables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ranks.bin')
+            built = writeTableFile(path)
+            mapped = readTableFile(path)
+
+            self.assertEqual(list(mapped['flush']), list(built['flush']))
+            self.assertEqual(list(mapped['productKeys']), list(built['productKeys']))
+            self.assertEqual(len(mapped['seven']), len(built['seven']))
+
+    def test_StaleTableFile_Read_ReturnsNone(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ranks.bin')
+            writeTableFile(path)
+            with open(path, 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b'\xff')
+
+            self.assertIsNone(readTableFile(path))
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_SevenCardArray_EvaluateBatch_MatchesPokerHand(self):
+        from PokerBatch import evaluateBatch, encodeHands
+        from BroadPokerTests import createSampleHands
+        hands = createSampleHands(200, 7)
+
+        strengths, categories = evaluateBatch(encodeHands(hands))
+        expected = [getPokerHand(h) for h in hands]
+
+        self.assertEqual(list(strengths), [h.strength for h in expected])
+        self.assertEqual(list(categories), [h.category.value for h in expected])
+
+    def test_PocketAces_MonteCarloEquity_IsReproducibleAndFavored(self):
+        from PokerEquity import monteCarloEquity
+        first = monteCarloEquity(['AH', 'AS'], iterations=4000, seed=7, workers=1,
+                batchSize=1000)
+        second = monteCarloEquity(['AH', 'AS'], iterations=4000, seed=7, workers=1,
+                batchSize=1000)
+
+        self.assertEqual(first.equity, second.equity)
+        self.assertAlmostEqual(first.equity, 0.85, delta=0.03)
+
+    def test_SmallBatches_MonteCarloEquity_RunsMinimumBeforeStopping(self):
+        from PokerEquity import monteCarloEquity
+        result = monteCarloEquity(['AH', 'AS'], iterations=4000, targetStandardError=0.05,
+                seed=7, workers=1, batchSize=5)
+
+        self.assertGreaterEqual(result.iterations, 1000)
+        self.assertLess(result.iterations, 4000)
+
+    def test_TurnBoard_ExactEquity_MatchesBruteForce(self):
+        from itertools import combinations
+        from PokerEquity import exactEquity
+        players = [['AH', 'KH'], ['QS', 'QD'], ['9C', '8C']]
+        board = ['2H', '7H', 'QC', '10C']
+        used = [c for p in players for c in p] + board
+        deck = [c for c in Deck.getStandardSortedDeck()
+                if str(c.rank.value) + c.suit.value not in used]
+
+        expected = [0.0] * len(players)
+        for runout in combinations(deck, 1):
+            hands = [getPokerHand(p + board + [str(c.rank.value) + c.suit.value
+                for c in runout]) for p in players]
+            best = max(h.strength for h in hands)
+            winners = [i for i, h in enumerate(hands) if h.strength == best]
+            for i in winners:
+                expected[i] += 1 / len(winners) / len(deck)
+
+        actual = [r.equity for r in exactEquity(players, board)]
+
+        for a, e in zip(actual, expected):
+            self.assertAlmostEqual(a, e)
+
+    def test_PairsWithKickerSumsEqual_Compare_HigherKickerWins(self):
+        kingFour = getPokerHand(['8H', '8S', 'KD', '4C', '2H'])
+        queenFive = getPokerHand(['8D', '8C', 'QS', '5H', '2D'])
+
+        self.assertGreater(kingFour, queenFive)
+        self.assertNotEqual(kingFour.score(), queenFive.score())
+        self.assertEqual(len({kingFour, queenFive, getPokerHand(['8D', '8C', 'KS', '4H', '2D'])}), 2)
+
+    def test_CardFromStringAndFromRankSuit_Construct_ReturnSameCard(self):
+        card = Card('10H')
+
+        self.assertIs(card, Card(Rank.TEN, Suit.HEARTS))
+        self.assertIs(card, parseCards(['AS', '10H'])[1])
+        self.assertRaises(AttributeError, setattr, card, 'rank', Rank.TWO)
+        self.assertRaises(ValueError, parseCards, ['AS', '1H'])
+
+    def test_CodeDeckWithRemovedCards_DealAll_DealsEveryOtherCardOnce(self):
+        deck = CodeDeck(seed=11)
+        deck.removeCards([Card('AH').code, Card('2C').code])
+
+        first = deck.deal(50)
+        deck.reset()
+        second = deck.deal(50)
+
+        self.assertEqual(sorted(first), sorted(second))
+        self.assertEqual(len(set(first)), 50)
+        self.assertNotIn(Card('AH').code, first)
+        self.assertEqual(CodeDeck(seed=11).deal(5), CodeDeck(seed=11).deal(5))
+        self.assertRaises(ValueError, deck.deal)
+
+    def test_Instrumented_BuildHands_CountsPhasesAndRestoresFunctions(self):
+        import io
+        from contextlib import redirect_stdout
+        import Poker
+        import PokerInstrumentation
+        import BroadPokerTests
+        original = Poker.evaluateSeven
+        PokerInstrumentation.reset()
+
+        with PokerInstrumentation.instrumented():
+            getPokerHand(['3H', '7S', '3S', 'QD', 'AH', '3D', '4S'])
+            getPokerHand(['3H', '7S', '3S', 'QD', 'AH'])
+            with redirect_stdout(io.StringIO()):
+                BroadPokerTests.whoIsTheWinner(['AH', 'KH', 'QH', 'JH', '10H'],
+                        ['2C', '2D', '3S', '4S', '5S'])
+
+        totals = PokerInstrumentation.phaseTotals()
+        self.assertEqual(totals['construct'][0], 4)
+        self.assertEqual(totals['showdown'][0], 1)
+        self.assertEqual(totals['bestHand'][0], 1)
+        self.assertIs(Poker.evaluateSeven, original)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_TwoClasses_BuildPreflopMatrix_SavesAndResumes(self):
+        from PokerPreflop import PreflopMatrix, buildPreflopMatrix, parseStartingHandClass
+        aceKing = parseStartingHandClass('AKs')
+        sevenTwo = parseStartingHandClass('72s')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'preflop.bin')
+            buildPreflopMatrix(path, ['AKs', '72s'], workers=1)
+            # Everything is computed already, so nothing is recomputed.
+            buildPreflopMatrix(path, ['AKs', '72s'], workers=1)
+            matrix = PreflopMatrix.load(path)
+
+        self.assertAlmostEqual(matrix.equity(aceKing, sevenTwo), 0.66, delta=0.02)
+        self.assertAlmostEqual(matrix.equity(sevenTwo, aceKing),
+                1 - matrix.equity(aceKing, sevenTwo), places=5)
+        self.assertRaises(LookupError, matrix.equity, aceKing, parseStartingHandClass('KK'))
+
+    def test_RangeTokens_ParseRange_ExpandsToCombos(self):
+        from PokerRanges import parseRange
+        self.assertEqual(len(parseRange('TT+')), 30)
+        self.assertEqual(len(parseRange('AKs, AKo')), 16)
+        self.assertEqual(len(parseRange('A2s-A5s ATs+')), 32)
+        self.assertEqual(len(parseRange('AA', deadCards=['AH'])), 3)
+        self.assertEqual(parseRange('AhKh:0.5')[0][2], 0.5)
+        self.assertRaises(ValueError, parseRange, 'AKx')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_SingleCombos_RangeEquity_MatchesExactEquity(self):
+        from PokerEquity import exactEquity
+        from PokerRanges import rangeEquity
+        board = ['2H', '7H', 'QC']
+        first, second = rangeEquity('AhKh', 'QsQd', board)
+        exact = exactEquity([['AH', 'KH'], ['QS', 'QD']], board)[0]
+        self.assertAlmostEqual(first.equity, exact.equity)
+        self.assertAlmostEqual(first.equity + second.equity, 1)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'the service needs Python 3.7')
+    def test_ConcurrentRequests_ShowdownService_BatchesAndAnswersEach(self):
+        import asyncio
+        import json
+        from PokerService import ShowdownService
+
+        async def exchange(requests):
+            service = ShowdownService(workers=1)
+            server = await service.start(port=0)
+            reader, writer = await asyncio.open_connection('127.0.0.1',
+                    server.sockets[0].getsockname()[1])
+            writer.write(b''.join(json.dumps(r).encode() + b'\n' for r in requests))
+            writer.write_eof()
+            # The service closes the connection after answering everything.
+            responses = [json.loads(line) for line in (await reader.read()).splitlines()]
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+            service.close()
+            return { r['id'] : r for r in responses }, service.stats()
+
+        responses, stats = asyncio.run(exchange([
+            { 'id' : 1, 'op' : 'evaluate', 'cards' : ['JH', '4C', '4S', 'JC', '9H'] },
+            { 'id' : 2, 'op' : 'showdown', 'hands' : [['2D', '2S', '3D', '4D', '5S'],
+                ['3H', '7S', '3S', 'QD', 'AH', '3D', '4S']] },
+            { 'id' : 3, 'op' : 'evaluate', 'cards' : ['JH', '4C'] }]))
+
+        self.assertEqual(responses[1]['result']['category'], 'TWO_PAIR')
+        self.assertEqual(responses[2]['result']['winners'], [1])
+        self.assertEqual(responses[2]['result']['hands'][1]['cards'],
+                ['AH', 'QD', '3H', '3S', '3D'])
+        self.assertIn('error', responses[3])
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['errors'], 1)
+
+    def test_JsonLinesWithBadLine_EvaluateStream_WritesResultsInOrder(self):
+        import io
+        import json
+        from PokerBulk import evaluateStream
+        lines = ['["JH", "4C", "4S", "JC", "9H"]', '', '["AH", "KH"]',
+                '["3H", "7S", "3S", "QD", "AH", "3D", "4S"]']
+        output = io.StringIO()
+        count = evaluateStream(lines, output, chunkSize=2, workers=2)
+        results = [json.loads(l) for l in output.getvalue().splitlines()]
+
+        self.assertEqual(count, 3)
+        self.assertEqual(results[0]['category'], 'TWO_PAIR')
+        self.assertEqual(results[1]['line'], 3)
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['cards'], ['AH', 'QD', '3H', '3S', '3D'])
+
+    def test_FourFlushOnBoard_OmahaHand_UsesTwoHoleCards(self):
+        from PokerVariants import omahaHand, omahaLow, omahaWinners
+        board = ['QH', 'JH', '10H', '9H', '5S']
+        # A single heart in the hole does not make a flush in Omaha.
+        hand = omahaHand(['AH', '2C', '2D', '3D'], board)
+        self.assertEqual(hand.category, PokerHandCategory.ONE_PAIR)
+
+        lowBoard = ['4H', '8C', 'QH', '5S', '6S']
+        self.assertEqual([str(c.rank) for c in omahaLow(['AH', '2C', 'KD', '3D'],
+            lowBoard)], ['6', '5', '4', '2', 'A'])
+        self.assertIsNone(omahaLow(['KH', 'QC', 'KD', '3D'], lowBoard))
+        self.assertEqual(omahaWinners([['AH', '2C', 'KD', '3D'], ['7C', '3C', 'KS', 'QD']],
+            lowBoard, hiLo=True), ([1], [0]))
+
+    def test_FlushAgainstFullHouse_ShortDeckWinners_FlushWins(self):
+        from PokerVariants import shortDeckHand, shortDeckWinners
+        self.assertEqual(shortDeckWinners([['AH', '6H'], ['7C', '7D']],
+            ['7H', '8H', 'KH', 'KS', '9C']), [0])
+        _, category, _ = shortDeckHand(['AH', '6C', '7D', '8S', '9H', 'AC', 'AD'])
+        self.assertEqual(category, PokerHandCategory.STRAIGHT)
+
+    def test_StreetByStreet_HandState_MatchesFullEvaluation(self):
+        from PokerHandState import HandState
+        cards = ['AH', 'KH', 'QH', 'JH', '2C', '7D', '10H']
+        state = HandState(cards[:2])
+        self.assertIsNone(state.category())
+        for i, card in enumerate(cards[2:], 3):
+            state.addCard(card)
+            if i >= 5:
+                self.assertEqual(state.bestHand(), getPokerHand(cards[:i]))
+
+        self.assertEqual(state.category(), PokerHandCategory.ROYAL_FLUSH)
+        flop = HandState(cards[:5])
+        # 9 hearts for the flush, 3 other tens for the straight, and 14 other
+        # cards pairing a hole or board card.
+        self.assertEqual(len(flop.outs()), 26)
+        self.assertEqual(len(flop.outs(['10S'])), 25)
+
+    def test_TwoFiveCardSuits_WhichCardsShouldIChoose_PlaysHigherFlush(self):
+        from BroadPokerTests import whichCardsShouldIChoose
+        cards = ['2H', '4H', '6H', '8H', '10H', '3S', '5S', '7S', '9S', 'JS']
+
+        chosen = whichCardsShouldIChoose(cards)
+
+        self.assertEqual(chosen, ['JS', '9S', '7S', '5S', '3S'])
+        self.assertEqual(getPokerHand(cards).category, PokerHandCategory.FLUSH)
+
+    def test_FreshProcess_PokerHandWithStrength_LoadsTables(self):
+        import subprocess
+        cards = ['3H', '7S', '3S', 'QD', 'AH', '3D', '4S']
+        strength = getPokerHand(cards).strength
+        # In a new interpreter, so the tables are not loaded yet
+        script = str.join('\n', ['from Poker import *',
+            f'cards = parseCards({cards!r})',
+            f'print(PokerHand(cards, {strength}).category.name)',
+            f'print(len(LazyPokerHand(cards, {strength}).cards))'])
+        output = subprocess.run([sys.executable, '-c', script], stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, universal_newlines=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        self.assertEqual(output.stdout.split(), ['THREE_OF_A_KIND', '5'], output.stderr)
+
+    def test_SevenCardsWithWheel_LazyPokerHand_MatchesPokerHand(self):
+        cards = ['AH', '2C', '3S', '4D', '5H', 'KC', 'KD']
+        lazy = LazyPokerHand(parseCards(cards))
+        self.assertEqual(lazy, getPokerHand(cards))
+        # Comparing hands does not choose the cards
+        self.assertNotIn('_cards', vars(lazy))
+        self.assertEqual(str(lazy), str(getPokerHand(cards)))
+        self.assertIn('_cards', vars(lazy))
+        self.assertEqual(lazy.cards[-1].rank, Rank.ACE)
+        self.assertIs(lazy.kicker, lazy.kicker)
+
+    def test_RareCategories_SampleCategoryHands_DrawsOnlyThoseCategories(self):
+        from PokerSampling import categoryHandCount, sampleCategoryHands
+        self.assertEqual(sum(categoryHandCount(c) for c in PokerHandCategory), 2598960)
+        self.assertEqual(categoryHandCount(PokerHandCategory.FULL_HOUSE), 3744)
+
+        categories = [PokerHandCategory.STRAIGHT_FLUSH, PokerHandCategory.ROYAL_FLUSH]
+        hands = sampleCategoryHands(categories, 200, seed=7)
+        self.assertEqual(len(hands), 200)
+        for cards in hands:
+            self.assertIn(PokerHand(cards).category, categories)
+        self.assertEqual([[c.code for c in h] for h in hands],
+                [[c.code for c in h] for h in sampleCategoryHands(categories, 200, seed=7)])
+
+    def test_FiveAndSevenCardSets_HandIndex_RoundTrips(self):
+        from PokerIndex import handCount, handIndex, unrankHand
+        royal = ['AH', 'KH', 'QH', 'JH', '10H']
+        index = handIndex(royal)
+        self.assertEqual(index, handIndex(royal[::-1]))
+        self.assertEqual(sorted(str(c) for c in unrankHand(index, 5)),
+                sorted(str(c) for c in parseCards(royal)))
+        self.assertEqual(handCount(5), 2598960)
+        self.assertEqual(handIndex(unrankHand(handCount(7) - 1, 7)), handCount(7) - 1)
+        self.assertRaises(ValueError, handIndex, ['AH', 'AH'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_IndexArray_UnrankHandArray_InvertsHandIndexArray(self):
+        from PokerIndex import handIndex, handIndexArray, unrankHandArray
+        indexes = numpy.arange(0, 2598960, 997)
+        hands = unrankHandArray(indexes, 5)
+        self.assertTrue((handIndexArray(hands) == indexes).all())
+        self.assertEqual(handIndex([int(c) for c in hands[1]]), 997)
+
+    def test_SuitPermutedBoards_CanonicalKey_Match(self):
+        from itertools import combinations
+        from PokerCache import canonicalKey, cachedExactEquity
+        self.assertEqual(len(set(canonicalKey([flop]) for flop in
+            combinations(standardSortedDeck, 3))), 1755)
+
+        cachedExactEquity.cache.clear()
+        first = cachedExactEquity([['AH', 'KH'], ['QS', 'QD']], ['2H', '7H', 'QC'])
+        second = cachedExactEquity([['AS', 'KS'], ['QH', 'QD']], ['2S', '7S', 'QC'])
+        self.assertIs(first, second)
+        self.assertEqual(cachedExactEquity.cache.stats()['hits'], 1)
+        self.assertNotEqual(canonicalKey([['AH', 'KH'], ['2H', '7H', 'QC']]),
+                canonicalKey([['AH', 'KS'], ['2H', '7H', 'QC']]))
+
+    def test_FullCache_Put_EvictsByPolicy(self):
+        from PokerCache import MemoCache
+        for policy, kept in (('lru', ['a', 'c']), ('lfu', ['c', 'd'])):
+            cache = MemoCache(2, policy)
+            cache.put('a', 1)
+            cache.put('b', 2)
+            cache.get('a')
+            cache.put('c', 3)
+            cache.get('c')
+            cache.get('c')
+            if policy == 'lfu':
+                cache.put('d', 4)
+            self.assertEqual(sorted(cache.values), kept)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_InterruptedSimulation_Resume_MatchesUninterruptedRun(self):
+        from PokerSimulator import playShard, simulateTournaments, writeCheckpoint
+        full = simulateTournaments(3000, players=4, seed=11, shardRounds=1000, workers=1)
+        self.assertEqual(full.rounds, 3000)
+        self.assertEqual(sum(full.handsByCategory), 12000)
+        self.assertAlmostEqual(sum(full.seatWinRates()), 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.json')
+            settings = { 'rounds' : 3000, 'players' : 4, 'cardsToDraw' : 7,
+                    'seed' : 11, 'shardRounds' : 1000 }
+            # As if the run stopped after its first shard
+            writeCheckpoint(path, settings, {0}, playShard(0, 1000, 4, 7, 11)[1])
+            resumed = simulateTournaments(3000, players=4, seed=11, shardRounds=1000,
+                    workers=1, checkpointPath=path)
+            self.assertRaises(ValueError, simulateTournaments, 3000, players=5,
+                    seed=11, shardRounds=1000, workers=1, checkpointPath=path)
+
+        self.assertEqual(resumed.toDict(), full.toDict())
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_CheckpointWithoutSeed_Resume_UsesCheckpointSeed(self):
+        from PokerSimulator import readCheckpoint, simulateTournaments
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.json')
+            first = simulateTournaments(2000, players=4, shardRounds=1000, workers=1,
+                    checkpointPath=path)
+            settings = { 'rounds' : 2000, 'players' : 4, 'cardsToDraw' : 7,
+                    'seed' : None, 'shardRounds' : 1000 }
+            readCheckpoint(path, settings)
+            # Running the same command again finds every shard done
+            again = simulateTournaments(2000, players=4, shardRounds=1000, workers=1,
+                    checkpointPath=path)
+            seeded = simulateTournaments(2000, players=4, seed=settings['seed'],
+                    shardRounds=1000, workers=1)
+
+        self.assertEqual(again.toDict(), first.toDict())
+        self.assertEqual(seeded.toDict(), first.toDict())
+
+    def test_SampleHands_WriteAndReadHandHistory_RoundTrips(self):
+        from BroadPokerTests import createSampleHands
+        from PokerHistory import HandHistory, writeHandHistory
+        hands = createSampleHands(50, 7, seed=5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'hands.bin')
+            writeHandHistory(path, hands, evaluate=True)
+            # Header, then cards, strengths and categories padded to 8 bytes
+            self.assertEqual(os.path.getsize(path), 24 + 352 + 104 + 56)
+            with HandHistory(path) as history:
+                read = [[cardStringsByCode[c.code] for c in hand] for hand in history]
+                strength = history.strength(3)
+                category = history.category(3)
+
+        self.assertEqual(read, hands)
+        self.assertEqual(strength, getPokerHand(hands[3]).strength)
+        self.assertEqual(category, getPokerHand(hands[3]).category)
+
+    def test_AllInsAndFold_ResolveShowdowns_SplitsSidePots(self):
+        from PokerShowdown import resolveShowdowns
+        table = { 'board' : ['2H', '7H', 'QC', '3D', '4S'], 'players' : [
+            { 'id' : 'ann', 'cards' : ['AH', 'KH'], 'stack' : 0, 'contribution' : 100 },
+            { 'id' : 'bob', 'cards' : ['QS', 'QD'], 'stack' : 700, 'contribution' : 300 },
+            { 'id' : 'cat', 'contribution' : 51, 'folded' : True },
+            { 'id' : 'dan', 'cards' : ['5C', '6C'], 'stack' : 0, 'contribution' : 200 },
+            { 'id' : 'eve', 'cards' : ['5D', '6D'], 'stack' : 0, 'contribution' : 301 }]}
+        folded = { 'players' : [{ 'contribution' : 20, 'folded' : True },
+            { 'contribution' : 40, 'stack' : 60 }]}
+
+        result, walkover = resolveShowdowns([table, folded])
+
+        self.assertEqual([(p['amount'], p['eligible'], p['winners']) for p in result['pots']],
+                [(451, ['ann', 'bob', 'dan', 'eve'], ['dan', 'eve']),
+                 (300, ['bob', 'dan', 'eve'], ['dan', 'eve']),
+                 (200, ['bob', 'eve'], ['eve']),
+                 (1, ['eve'], ['eve'])])
+        # The odd chip of the main pot goes to the first winner in seat order
+        self.assertEqual(result['pots'][0]['shares'], { 'dan' : 226, 'eve' : 225 })
+        self.assertEqual(result['stacks'], { 'ann' : 0, 'bob' : 700, 'cat' : 0,
+            'dan' : 376, 'eve' : 576 })
+        self.assertEqual(result['hands']['dan']['category'], 'STRAIGHT')
+        self.assertEqual(walkover['winners'], [1])
+        self.assertEqual(walkover['stacks'], { 0 : 0, 1 : 120 })
+
+    def test_CheckedDown_ResolveShowdown_MakesNoEmptyPot(self):
+        from PokerShowdown import resolveShowdown
+        table = { 'board' : ['2H', '7H', 'QC', '3D', '4S'], 'players' : [
+            { 'cards' : ['AH', 'KH'], 'stack' : 50, 'contribution' : 0 },
+            { 'cards' : ['QS', 'QD'], 'stack' : 50, 'contribution' : 0 }]}
+
+        result = resolveShowdown(table)
+
+        self.assertEqual(result['pots'], [])
+        self.assertEqual(result['winners'], [1])
+        self.assertEqual(result['payouts'], { 0 : 0, 1 : 0 })
+
+    def test_SampledHands_DifferentialTest_FindsNoMismatches(self):
+        from PokerReference import differentialTest, referenceBestHand
+        wheel = [Card(c) for c in ['AH', '2C', '3D', '4S', '5H', '5D', 'KC']]
+
+        fives, sevens = differentialTest(fiveCardStep=2599, sevenCardSamples=300, seed=3)
+        score, best = referenceBestHand(wheel)
+
+        self.assertEqual((fives.hands, fives.mismatches), (1000, []))
+        self.assertEqual((sevens.hands, sevens.mismatches), (300, []))
+        self.assertEqual(score, (PokerHandCategory.STRAIGHT.value, (3, 2, 1, 0, 12)))
+        self.assertEqual(PokerHand(wheel).category, PokerHandCategory.STRAIGHT)
+
 
 def getPokerHand(hand):
     return PokerHand([Card(c) for c in hand])
@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from itertools import combinations
+import Poker
+from Poker import *
+
+# Omaha
+#
+# An Omaha hand is made of exactly 2 of a player's hole cards and 3 of the
+# board cards: 6 pairs of 4 hole cards times 10 triples of a 5-card board, or
+# 60 hands per player. The triples are the same for every player, so their
+# part of the 5-card lookup (OR of the rank bits, common suit bits, product of
+# the rank primes) is computed once per board and only combined with each
+# pair of hole cards.
+#
+# In Omaha Hi/Lo the pot is split with the best low hand, if any: 5 cards of
+# different ranks, all 8 or lower, with aces low. Straights and flushes do not
+# count against a low. As a bit mask of the ranks (ace = bit 0, 8 = bit 7), a
+# lower mask is a better low, since lows compare by their highest card first.
+
+def lowBit(code):
+    """ The low mask bit of a card code, or 0 if it is above 8 """
+    rank = (code >> 8) & 0xF
+    if rank == 12:
+        return 1
+    if rank <= 6:
+        return 1 << (rank + 1)
+    return 0
+
+class OmahaBoard(object):
+    """ The 3-card subsets of a 3 to 5 card board, evaluated once for all
+    players """
+    def __init__(self, board):
+        self.board = cardCodes(board)
+        if not 3 <= len(self.board) <= 5:
+            raise ValueError('An Omaha board has 3 to 5 cards.')
+        if Poker.handClasses is None:
+            Poker.loadTables()
+        self.triples = []
+        for triple in combinations(self.board, 3):
+            a, b, c = triple
+            lowMask = lowBit(a) | lowBit(b) | lowBit(c)
+            self.triples.append((triple, (a | b | c) >> 16, a & b & c & 0xF000,
+                (a & 0xFF) * (b & 0xFF) * (c & 0xFF),
+                lowMask if bin(lowMask).count('1') == 3 else 0))
+
+    def high(self, holeCards):
+        """ Returns the strength and the 5 card codes of the best high hand
+        made of 2 of holeCards and 3 board cards """
+        flushTable = Poker.flushTable
+        uniqueTable = Poker.uniqueTable
+        productKeys = Poker.productKeys
+        productStrengths = Poker.productStrengths
+        best = 0
+        bestCodes = None
+        for x, y in combinations(cardCodes(holeCards), 2):
+            pairRanks = (x | y) >> 16
+            pairSuits = x & y & 0xF000
+            pairProduct = (x & 0xFF) * (y & 0xFF)
+            for triple, ranks, suits, product, _ in self.triples:
+                if suits & pairSuits:
+                    strength = flushTable[ranks | pairRanks]
+                else:
+                    strength = uniqueTable[ranks | pairRanks]
+                    if not strength:
+                        strength = productStrengths[bisect_left(productKeys,
+                            product * pairProduct)]
+                if strength > best:
+                    best = strength
+                    bestCodes = (x, y) + triple
+        return best, bestCodes
+
+    def low(self, holeCards):
+        """ Returns the mask and the 5 card codes of the best 8-or-better low
+        made of 2 of holeCards and 3 board cards, or (0, None) if there is no
+        low """
+        best = 0
+        bestCodes = None
+        for x, y in combinations(cardCodes(holeCards), 2):
+            pairMask = lowBit(x) | lowBit(y)
+            if bin(pairMask).count('1') != 2:
+                continue
+            for triple, _, _, _, tripleMask in self.triples:
+                if tripleMask and not tripleMask & pairMask:
+                    mask = tripleMask | pairMask
+                    if not best or mask < best:
+                        best = mask
+                        bestCodes = (x, y) + triple
+        return best, bestCodes
+
+def omahaHand(holeCards, board):
+    """ Returns the best Omaha PokerHand of holeCards on a board """
+    strength, codes = OmahaBoard(board).high(holeCards)
+    return PokerHand([cardsByCode[c] for c in codes], strength)
+
+def omahaLow(holeCards, board):
+    """ Returns the Cards of the best 8-or-better low of holeCards on a board,
+    highest first, or None if there is no low """
+    mask, codes = OmahaBoard(board).low(holeCards)
+    if not mask:
+        return None
+    cards = [cardsByCode[c] for c in codes]
+    return sorted(cards, key=lambda c: lowBit(c.code), reverse=True)
+
+def omahaWinners(players, board, hiLo=False):
+    """ Returns the indexes of the players with the best high hand. With hiLo,
+    returns the high winners and the low winners (empty if no player has a
+    low). """
+    board = OmahaBoard(board)
+    strengths = [board.high(p)[0] for p in players]
+    highWinners = [i for i, s in enumerate(strengths) if s == max(strengths)]
+    if not hiLo:
+        return highWinners
+    lows = [board.low(p)[0] for p in players]
+    qualified = [m for m in lows if m]
+    lowWinners = [i for i, m in enumerate(lows) if qualified and m == min(qualified)]
+    return highWinners, lowWinners
+
+# Short deck
+#
+# Short deck (six plus) hold'em is played without the 2s to 5s. Flushes are
+# rarer than full houses and beat them, and the ace plays low in A-6-7-8-9,
+# the lowest straight. Hands are compared by a key of the short deck order of
+# their category and their strength, where the low straight is strength 0.
+
+SHORT_DECK_CATEGORIES = (PokerHandCategory.HIGH_CARD, PokerHandCategory.ONE_PAIR,
+        PokerHandCategory.TWO_PAIR, PokerHandCategory.THREE_OF_A_KIND,
+        PokerHandCategory.STRAIGHT, PokerHandCategory.FULL_HOUSE,
+        PokerHandCategory.FLUSH, PokerHandCategory.FOUR_OF_A_KIND,
+        PokerHandCategory.STRAIGHT_FLUSH, PokerHandCategory.ROYAL_FLUSH)
+shortDeckOrder = { c : i for i, c in enumerate(SHORT_DECK_CATEGORIES) }
+SHORT_DECK_LOW_STRAIGHT = rankBits([12, 4, 5, 6, 7])
+
+def shortDeck():
+    """ Returns the codes of the 36 cards of a short deck, for a CodeDeck """
+    return [c.code for c in standardSortedDeck if rankIndexes[c.rank] >= 4]
+
+def shortDeckKey(codes):
+    """ Returns the comparison key of 5 card codes in short deck """
+    strength = evaluateFive(*codes)
+    category = Poker.handClasses[strength][0]
+    ranks = (codes[0] | codes[1] | codes[2] | codes[3] | codes[4]) >> 16
+    if ranks == SHORT_DECK_LOW_STRAIGHT:
+        if category == PokerHandCategory.FLUSH:
+            return (shortDeckOrder[PokerHandCategory.STRAIGHT_FLUSH], 0)
+        return (shortDeckOrder[PokerHandCategory.STRAIGHT], 0)
+    return (shortDeckOrder[category], strength)
+
+def shortDeckHand(cards):
+    """ Returns the key, category and Cards of the best short deck hand of 5
+    or more cards """
+    codes = max(combinations(cardCodes(cards), 5), key=shortDeckKey)
+    key = shortDeckKey(codes)
+    return key, SHORT_DECK_CATEGORIES[key[0]], [cardsByCode[c] for c in codes]
+
+def shortDeckWinners(players, board):
+    """ Returns the indexes of the players with the best short deck hand """
+    board = cardCodes(board)
+    keys = [max(shortDeckKey(c) for c in combinations(cardCodes(p) + board, 5))
+            for p in players]
+    return [i for i, k in enumerate(keys) if k == max(keys)]